@@ -55,6 +55,19 @@ async def update_saved_connection(connection_id: str, config: ConnectionConfig):
     return {"success": True, "message": message}
 
 
+@router.post("/reconnect")
+async def reconnect_all_connections():
+    """Reconnect all saved connections that are not currently active."""
+    results = await connection_manager.reconnect_all()
+
+    return {
+        "results": [
+            {"connection_id": connection_id, "success": success, "message": message}
+            for connection_id, (success, message) in results.items()
+        ]
+    }
+
+
 @router.post("/reconnect/{connection_id}")
 async def reconnect_connection(connection_id: str):
     """Reconnect to a saved connection."""
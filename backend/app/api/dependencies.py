@@ -0,0 +1,48 @@
+"""Shared FastAPI dependencies for API routes."""
+
+from typing import Any, TypeVar
+
+from fastapi import Depends, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def json_body(model: type[ModelT]) -> Any:
+    """Parse and validate the request body in a single pass.
+
+    FastAPI decodes the body with json.loads and then validates the resulting
+    dicts. model_validate_json parses the raw bytes directly in pydantic-core.
+    Validation errors are reported like FastAPI's own body errors (422, with
+    locations prefixed by "body").
+
+    Usage:
+        async def handler(request: QueryExecuteRequest = json_body(QueryExecuteRequest)):
+            ...
+
+    Pair with ``openapi_extra=json_body_openapi(Model)`` on the route so the
+    request body is still documented.
+    """
+
+    async def parse_body(request: Request) -> ModelT:
+        body = await request.body()
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            errors = [
+                {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+            ]
+            raise RequestValidationError(errors, body=body) from e
+
+    return Depends(parse_body)
+
+
+def json_body_openapi(model: type[BaseModel]) -> dict[str, Any]:
+    """OpenAPI ``requestBody`` for routes that read their body with json_body()."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
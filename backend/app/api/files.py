@@ -5,8 +5,14 @@ from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
-
-from app.models.schemas import FileInfo, FileMetadata, FileUploadResponse
+from fastapi.responses import Response
+
+from app.models.schemas import (
+    FILE_INFO_LIST_ADAPTER,
+    FileInfo,
+    FileMetadata,
+    FileUploadResponse,
+)
 from app.services.duckdb_manager import get_duckdb_manager
 from app.services.file_repository import file_repository
 
@@ -113,7 +119,7 @@ async def list_files(query_id: Optional[str] = None):
         else:
             files = file_repository.get_all_files()
 
-        return [
+        file_infos = [
             FileInfo(
                 id=f["id"],
                 name=f["name"],
@@ -125,6 +131,9 @@ async def list_files(query_id: Optional[str] = None):
             )
             for f in files
         ]
+        return Response(
+            content=FILE_INFO_LIST_ADAPTER.dump_json(file_infos), media_type="application/json"
+        )
     except Exception as e:
         logger.error(f"Failed to list files: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list files: {str(e)}")
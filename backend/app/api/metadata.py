@@ -3,8 +3,13 @@
 import logging
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 
-from app.models.schemas import ConnectionMetadataLite, TableMetadata
+from app.models.schemas import (
+    CONNECTION_METADATA_LIST_ADAPTER,
+    ConnectionMetadataLite,
+    TableMetadata,
+)
 from app.services.connection_repository import connection_repository
 from app.services.metadata import get_metadata_service
 
@@ -43,7 +48,10 @@ async def get_all_connections_metadata():
                 # Skip connections that fail to load metadata
                 continue
 
-        return metadata_list
+        return Response(
+            content=CONNECTION_METADATA_LIST_ADAPTER.dump_json(metadata_list),
+            media_type="application/json",
+        )
 
     except Exception as e:
         logger.error(f"Failed to get all metadata: {e}")
@@ -63,6 +71,27 @@ async def get_connection_metadata(connection_id: str):
     Returns:
         Lightweight metadata including schemas and table names
     """
+    return await _load_connection_metadata(connection_id)
+
+
+@router.post("/{connection_id}/refresh", response_model=ConnectionMetadataLite)
+async def refresh_connection_metadata(connection_id: str):
+    """Manually refresh lightweight metadata for a connection.
+
+    Args:
+        connection_id: The connection identifier
+
+    Returns:
+        Updated lightweight metadata (table names only)
+    """
+    # Same as the get endpoint, but bypasses the connection's metadata cache
+    return await _load_connection_metadata(connection_id, force_refresh=True)
+
+
+async def _load_connection_metadata(
+    connection_id: str, force_refresh: bool = False
+) -> ConnectionMetadataLite:
+    """Load lightweight metadata for a connection, mapping failures to HTTP errors."""
     # Get connection config from repository
     connection_config = connection_repository.get(connection_id)
     if not connection_config:
@@ -75,6 +104,7 @@ async def get_connection_metadata(connection_id: str):
             connection_name=connection_config.name,
             source_type=connection_config.type,
             config=connection_config.config,
+            force_refresh=force_refresh,
         )
         return metadata
 
@@ -88,20 +118,6 @@ async def get_connection_metadata(connection_id: str):
         )
 
 
-@router.post("/{connection_id}/refresh", response_model=ConnectionMetadataLite)
-async def refresh_connection_metadata(connection_id: str):
-    """Manually refresh lightweight metadata for a connection.
-
-    Args:
-        connection_id: The connection identifier
-
-    Returns:
-        Updated lightweight metadata (table names only)
-    """
-    # Reuse the get endpoint logic (they're the same for now)
-    return await get_connection_metadata(connection_id)
-
-
 @router.get("/{connection_id}/table/{schema_name}/{table_name}", response_model=TableMetadata)
 async def get_table_details(connection_id: str, schema_name: str, table_name: str):
     """Get detailed metadata for a specific table (columns and row count).
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 
-from app.models.schemas import QueryRequest, QueryResult
+from app.models.schemas import QueryRequest, QueryResult, QueryResultErr, QueryResultOk
 from app.services.database import connection_manager
 
 router = APIRouter()
@@ -16,11 +16,10 @@ async def execute_query(request: QueryRequest):
 
     try:
         columns, rows = await datasource.execute_query(request.query)
-        return QueryResult(
-            success=True,
+        return QueryResultOk(
             columns=columns,
             rows=rows,
             row_count=len(rows),
         )
     except Exception as e:
-        return QueryResult(success=False, error=str(e))
+        return QueryResultErr(error=str(e))
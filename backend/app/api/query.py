@@ -4,12 +4,18 @@ import csv
 import io
 import logging
 import time
+from collections.abc import AsyncIterator
 from math import ceil
+from typing import Any
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from pydantic_core import to_json
 
+from app.api.dependencies import json_body, json_body_openapi
 from app.models.schemas import (
+    QUERY_LIST_ADAPTER,
+    ChatMessage,
     ChatRequest,
     ChatResponse,
     Query,
@@ -34,13 +40,23 @@ router = APIRouter(prefix="/queries", tags=["queries"])
 logger = logging.getLogger(__name__)
 
 
+def _execute_result_response(result: QueryExecuteResult) -> Response:
+    """Serialize a query result straight to JSON bytes with Pydantic's Rust encoder.
+
+    Result pages can hold thousands of rows; this skips the jsonable_encoder
+    pass over every row dict that FastAPI otherwise performs.
+    """
+    return Response(content=result.model_dump_json(), media_type="application/json")
+
+
 # Query CRUD endpoints
 
 
 @router.get("/", response_model=list[Query])
 async def list_queries():
     """Get all queries."""
-    return query_repository.get_all_queries()
+    queries = query_repository.get_all_queries()
+    return Response(content=QUERY_LIST_ADAPTER.dump_json(queries), media_type="application/json")
 
 
 @router.post("/", response_model=Query)
@@ -62,8 +78,12 @@ async def get_query(query_id: str):
     return query
 
 
-@router.patch("/{query_id}/sql", response_model=Query)
-async def update_query_sql(query_id: str, request: QueryUpdateRequest):
+@router.patch(
+    "/{query_id}/sql", response_model=Query, openapi_extra=json_body_openapi(QueryUpdateRequest)
+)
+async def update_query_sql(
+    query_id: str, request: QueryUpdateRequest = json_body(QueryUpdateRequest)
+):
     """Update the SQL text of a query."""
     query = query_repository.get_query(query_id)
     if not query:
@@ -191,7 +211,7 @@ async def add_query_selection(query_id: str, selection: QueryTableSelectionReque
     try:
         # If it's an S3 file, create a DuckDB view for it
         if selection.source_type == "s3":
-            from app.models.schemas import S3ConnectionConfig
+            from app.models.schemas import S3_CONNECTION_CONFIG_ADAPTER
             from app.services.s3_service import get_s3_service
 
             # First, ensure the S3 secret is configured in DuckDB
@@ -206,7 +226,7 @@ async def add_query_selection(query_id: str, selection: QueryTableSelectionReque
             # Configure S3 secret if not already done
             duckdb = get_duckdb_manager()
             if not duckdb.is_attached(selection.connection_id):
-                s3_config = S3ConnectionConfig(**conn_config.config)
+                s3_config = S3_CONNECTION_CONFIG_ADAPTER.validate_python(conn_config.config)
                 duckdb.configure_s3_secret(
                     selection.connection_id,
                     conn_config.name,
@@ -272,10 +292,16 @@ async def remove_query_selection(query_id: str, selection: QueryTableSelectionRe
 # Query Execution endpoints
 
 
-@router.post("/{query_id}/execute", response_model=QueryExecuteResult)
-async def execute_query(query_id: str, request: QueryExecuteRequest):
+@router.post(
+    "/{query_id}/execute",
+    response_model=QueryExecuteResult,
+    openapi_extra=json_body_openapi(QueryExecuteRequest),
+)
+async def execute_query(
+    query_id: str, request: QueryExecuteRequest = json_body(QueryExecuteRequest)
+):
     """Execute a query and return paginated results."""
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
 
     # Verify query exists
     query = query_repository.get_query(query_id)
@@ -316,9 +342,9 @@ async def execute_query(query_id: str, request: QueryExecuteRequest):
                         )
 
                     # Configure S3 secret in DuckDB
-                    from app.models.schemas import S3ConnectionConfig
+                    from app.models.schemas import S3_CONNECTION_CONFIG_ADAPTER
 
-                    s3_config = S3ConnectionConfig(**conn_config.config)
+                    s3_config = S3_CONNECTION_CONFIG_ADAPTER.validate_python(conn_config.config)
                     duckdb.configure_s3_secret(
                         selection.connection_id,
                         conn_config.name,
@@ -365,35 +391,49 @@ async def execute_query(query_id: str, request: QueryExecuteRequest):
             OFFSET {offset}
         """
 
-        columns, rows = duckdb.execute_query(paginated_query)
-
-        execution_time = (time.time() - start_time) * 1000  # Convert to ms
-
-        return QueryExecuteResult(
-            success=True,
-            columns=columns,
-            rows=rows,
-            total_rows=total_rows,
-            page=request.page,
-            page_size=request.page_size,
-            total_pages=total_pages,
-            execution_time_ms=execution_time,
+        if request.layout == "columns":
+            columns, data = duckdb.execute_query_columnar(paginated_query)
+            rows = None
+        else:
+            columns, rows = duckdb.execute_query(paginated_query)
+            data = None
+
+        execution_time_us = (time.perf_counter_ns() - start_ns) // 1000
+
+        return _execute_result_response(
+            QueryExecuteResult.from_trusted(
+                success=True,
+                columns=columns,
+                rows=rows,
+                data=data,
+                total_rows=total_rows,
+                page=request.page,
+                page_size=request.page_size,
+                total_pages=total_pages,
+                execution_time_us=execution_time_us,
+                execution_time_ms=execution_time_us / 1000,
+            )
         )
 
     except Exception as e:
         logger.error(f"Failed to execute query {query_id}: {e}")
-        execution_time = (time.time() - start_time) * 1000
-        return QueryExecuteResult(
-            success=False,
-            page=request.page,
-            page_size=request.page_size,
-            execution_time_ms=execution_time,
-            error=str(e),
+        execution_time_us = (time.perf_counter_ns() - start_ns) // 1000
+        return _execute_result_response(
+            QueryExecuteResult(
+                success=False,
+                page=request.page,
+                page_size=request.page_size,
+                execution_time_us=execution_time_us,
+                execution_time_ms=execution_time_us / 1000,
+                error=str(e),
+            )
         )
 
 
-@router.post("/{query_id}/export")
-async def export_query_to_csv(query_id: str, request: QueryExecuteRequest):
+@router.post("/{query_id}/export", openapi_extra=json_body_openapi(QueryExecuteRequest))
+async def export_query_to_csv(
+    query_id: str, request: QueryExecuteRequest = json_body(QueryExecuteRequest)
+):
     """Export full query results to CSV."""
     # Verify query exists
     query = query_repository.get_query(query_id)
@@ -434,9 +474,9 @@ async def export_query_to_csv(query_id: str, request: QueryExecuteRequest):
                         )
 
                     # Configure S3 secret in DuckDB
-                    from app.models.schemas import S3ConnectionConfig
+                    from app.models.schemas import S3_CONNECTION_CONFIG_ADAPTER
 
-                    s3_config = S3ConnectionConfig(**conn_config.config)
+                    s3_config = S3_CONNECTION_CONFIG_ADAPTER.validate_python(conn_config.config)
                     duckdb.configure_s3_secret(
                         selection.connection_id,
                         conn_config.name,
@@ -491,17 +531,10 @@ async def export_query_to_csv(query_id: str, request: QueryExecuteRequest):
 # Chat interaction endpoints
 
 
-@router.post("/{query_id}/chat", response_model=ChatResponse)
-async def chat_with_ai(query_id: str, request: ChatRequest):
-    """Send a chat message to edit the query SQL interactively."""
-    import time
-
-    request_start = time.time()
-
-    logger.debug("=" * 100)
-    logger.debug(f"📨 Received chat request for query_id: {query_id}")
-    logger.debug(f"User message: {request.message}")
-
+async def _load_chat_context(
+    query_id: str,
+) -> tuple[Query, list[dict[str, Any]], list[ChatMessage]]:
+    """Load the query, its table metadata and its chat history for an AI chat request."""
     # Verify query exists
     query = query_repository.get_query(query_id)
     if not query:
@@ -537,6 +570,48 @@ async def chat_with_ai(query_id: str, request: ChatRequest):
     chat_history = query_repository.get_chat_history(query_id)
     logger.debug(f"✓ Chat history: {len(chat_history)} messages")
 
+    return query, query_metadata, chat_history
+
+
+def _save_chat_result(query_id: str, user_message: str, result: dict[str, str]) -> ChatResponse:
+    """Save the AI-edited SQL and the chat exchange that produced it."""
+    # Update query SQL
+    logger.debug("Updating query SQL...")
+    query_repository.update_query_sql(query_id, result["sql"])
+    logger.debug("✓ Query SQL updated")
+
+    # Only save messages after successful AI generation
+    logger.debug("Saving chat messages...")
+    query_repository.add_chat_message(query_id, "user", user_message)
+    assistant_message = query_repository.add_chat_message(
+        query_id, "assistant", result.get("explanation", "SQL updated")
+    )
+    logger.debug("✓ Chat messages saved")
+
+    return ChatResponse(
+        message=assistant_message,
+        updated_sql=result["sql"],
+    )
+
+
+def _sse_event(event: str, data: bytes) -> bytes:
+    """Encode one server-sent event."""
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+@router.post(
+    "/{query_id}/chat", response_model=ChatResponse, openapi_extra=json_body_openapi(ChatRequest)
+)
+async def chat_with_ai(query_id: str, request: ChatRequest = json_body(ChatRequest)):
+    """Send a chat message to edit the query SQL interactively."""
+    request_start = time.time()
+
+    logger.debug("=" * 100)
+    logger.debug(f"📨 Received chat request for query_id: {query_id}")
+    logger.debug(f"User message: {request.message}")
+
+    query, query_metadata, chat_history = await _load_chat_context(query_id)
+
     # Generate updated SQL using AI (don't save messages until this succeeds)
     logger.debug("Calling AI service...")
     ai_start = time.time()
@@ -557,29 +632,68 @@ async def chat_with_ai(query_id: str, request: ChatRequest):
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate SQL: {str(e)}",
-        )
+        ) from e
 
-    # Update query SQL
-    logger.debug("Updating query SQL...")
-    query_repository.update_query_sql(query_id, result["sql"])
-    logger.debug("✓ Query SQL updated")
-
-    # Only save messages after successful AI generation
-    logger.debug("Saving chat messages...")
-    query_repository.add_chat_message(query_id, "user", request.message)
-    assistant_message = query_repository.add_chat_message(
-        query_id, "assistant", result.get("explanation", "SQL updated")
-    )
-    logger.debug("✓ Chat messages saved")
+    response = _save_chat_result(query_id, request.message, result)
 
     total_elapsed = time.time() - request_start
     logger.debug(f"✅ Request completed successfully in {total_elapsed:.2f}s")
     logger.debug("=" * 100)
 
-    return ChatResponse(
-        message=assistant_message,
-        updated_sql=result["sql"],
-    )
+    return response
+
+
+@router.post("/{query_id}/chat/stream", openapi_extra=json_body_openapi(ChatRequest))
+async def stream_chat_with_ai(query_id: str, request: ChatRequest = json_body(ChatRequest)):
+    """
+    Send a chat message and stream the AI response as server-sent events.
+
+    A "delta" event carries each response fragment as the model produces it.
+    The stream ends with a "done" event holding the ChatResponse once the SQL
+    and messages are saved, or an "error" event if generation fails.
+    """
+    query, query_metadata, chat_history = await _load_chat_context(query_id)
+
+    try:
+        ai_service = get_ai_service()
+    except Exception as e:
+        logger.error(f"AI service unavailable: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate SQL: {str(e)}",
+        ) from e
+
+    async def chat_events() -> AsyncIterator[bytes]:
+        # The response status is already sent, so failures are reported as "error" events
+        result: dict[str, str] | None = None
+        try:
+            async for event in ai_service.stream_edit_sql(
+                current_sql=query.sql_text,
+                user_message=request.message,
+                chat_history=chat_history,
+                query_metadata=query_metadata,
+            ):
+                if "delta" in event:
+                    yield _sse_event("delta", to_json(event))
+                else:
+                    result = event
+            if result is None:
+                raise RuntimeError("AI response ended without a result")
+        except Exception as e:
+            logger.error(f"AI service failed: {e}")
+            # If AI call fails, don't save any messages
+            yield _sse_event("error", to_json({"detail": f"Failed to generate SQL: {str(e)}"}))
+            return
+
+        try:
+            response = _save_chat_result(query_id, request.message, result)
+        except Exception as e:
+            logger.error(f"Failed to save chat result: {e}")
+            yield _sse_event("error", to_json({"detail": f"Failed to save chat result: {str(e)}"}))
+            return
+        yield _sse_event("done", response.model_dump_json().encode())
+
+    return StreamingResponse(chat_events(), media_type="text/event-stream")
 
 
 @router.get("/{query_id}/chat")
@@ -616,7 +730,7 @@ async def get_sql_history(query_id: str):
 
     history = query_repository.get_sql_history(query_id)
     versions = [
-        SQLHistoryItem(
+        SQLHistoryItem.from_trusted(
             id=h["id"],
             query_id=h["query_id"],
             sql_text=h["sql_text"],
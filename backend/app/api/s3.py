@@ -1,9 +1,15 @@
 """API endpoints for S3 operations."""
 
-from typing import Optional
+from collections.abc import AsyncIterator
+from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
 
+from app.connections.s3 import S3Connection
+from app.models.schemas import S3QueryRequest
+from app.services.database import connection_manager
 from app.services.s3_service import get_s3_service
 
 router = APIRouter(prefix="/s3", tags=["s3"])
@@ -89,3 +95,29 @@ async def create_s3_file_view(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create view: {str(e)}")
+
+
+@router.post("/{connection_id}/query/stream")
+async def stream_s3_query(connection_id: str, request: S3QueryRequest):
+    """
+    Execute a SQL query against S3 files and stream the rows as NDJSON.
+
+    Each line of the response body is one JSON object mapping column name to value.
+    Rows are read from DuckDB in batches, so large scans are never fully buffered.
+    """
+    datasource = await connection_manager.get_connection(connection_id)
+    if not datasource:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    if not isinstance(datasource, S3Connection):
+        raise HTTPException(status_code=400, detail="Connection is not an S3 connection")
+
+    try:
+        _, batches = await datasource.execute_query_stream(request.query)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Query failed: {str(e)}")
+
+    async def ndjson_lines(batches: AsyncIterator[list[dict[str, Any]]]) -> AsyncIterator[bytes]:
+        async for rows in batches:
+            yield b"".join([to_json(row) + b"\n" for row in rows])
+
+    return StreamingResponse(ndjson_lines(batches), media_type="application/x-ndjson")
@@ -9,6 +9,8 @@ from fastapi import APIRouter, HTTPException
 from app.config.settings import get_settings
 from app.models.schemas import AISettings, AISettingsUpdate
 from app.services import duckdb_manager
+from app.services.ai_service import close_llm_cache, invalidate_ai_settings_cache
+from app.services.connection_repository import connection_repository
 from app.services.duckdb_manager import get_duckdb_manager
 from app.services.migration_service import run_migrations
 from app.services.settings_repository import settings_repository
@@ -78,6 +80,7 @@ async def update_ai_settings(settings: AISettingsUpdate) -> AISettings:
             ai_model=settings.ai_model,
             ai_temperature=settings.ai_temperature,
         )
+        invalidate_ai_settings_cache()
 
         logger.info("AI settings updated successfully")
 
@@ -127,12 +130,23 @@ async def clear_all_data():
         db_path = data_dir / "connections.db"
         if db_path.exists():
             try:
+                # Release the open handles before the file goes away
+                connection_repository.close()
+                close_llm_cache()
                 os.remove(db_path)
+                # A leftover WAL must not be paired with the new database
+                for suffix in ("-wal", "-shm"):
+                    sidecar = db_path.with_name(db_path.name + suffix)
+                    if sidecar.exists():
+                        os.remove(sidecar)
                 logger.info("Deleted SQLite database")
 
                 # Reinitialize the database schema via migrations
                 run_migrations(db_path)
                 logger.info("Reinitialized database schema")
+
+                # Stored AI settings are gone; fall back to config/env
+                invalidate_ai_settings_cache()
             except Exception as e:
                 logger.error(f"Failed to clear SQLite database: {e}")
                 raise HTTPException(
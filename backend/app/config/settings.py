@@ -48,6 +48,21 @@ class Settings(BaseSettings):
     # AI Generation Settings
     AI_TEMPERATURE: float = 0.1  # Lower = more deterministic (0.0 - 2.0)
 
+    # Semantic response cache: reuse the SQL generated for a previous prompt when a
+    # new prompt means the same thing (cosine similarity of prompt embeddings).
+    # Costs one embedding call per prompt; the model must be served by a configured provider.
+    AI_SEMANTIC_CACHE_ENABLED: bool = False
+    AI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    AI_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+
+    # Keep exact-match LLM responses in the app database instead of memory, so
+    # repeated prompts are still answered from cache after a restart.
+    AI_PERSISTENT_CACHE_ENABLED: bool = False
+
+    # Answer chat edits that only change numbers or dates in an earlier message
+    # by substituting them into that message's SQL, without calling the LLM.
+    AI_TEMPLATE_CACHE_ENABLED: bool = False
+
     # Logging Configuration
     # Valid levels: DEBUG, INFO, WARNING, ERROR, CRITICAL
     LOG_LEVEL: str = "INFO"
@@ -15,12 +15,14 @@ To add a new connection type:
 from abc import ABC, abstractmethod
 from typing import Any, Optional
 
-from app.models.schemas import DataSourceType, TableSchema
+from app.models.schemas import DataSourceLiteral, DataSourceType, TableSchema
 
 
 class BaseConnection(ABC):
     """Abstract base class for all data source connections."""
 
+    __slots__ = ("connection_id", "connection_name", "config", "connection_error")
+
     def __init__(self, connection_id: str, connection_name: str, config: dict[str, Any]):
         self.connection_id = connection_id
         self.connection_name = connection_name
@@ -38,6 +40,21 @@ class BaseConnection(ABC):
         """
         pass
 
+    @classmethod
+    async def connect_all(cls, connections: list["BaseConnection"]) -> list[bool]:
+        """
+        Establish several connections of this type at once.
+
+        Args:
+            connections: Connection instances of this type
+
+        Returns:
+            Success flags in the same order as connections.
+            Failed connections have connection_error set.
+        """
+        # Default implementation: connect one at a time
+        return [await connection.connect() for connection in connections]
+
     @abstractmethod
     async def disconnect(self) -> None:
         """Close connection to the data source."""
@@ -115,6 +132,16 @@ class BaseConnection(ABC):
         """
         pass
 
+    def invalidate_cache(self) -> None:
+        """
+        Drop any cached metadata held for this connection.
+
+        Called before an explicit metadata refresh so the next collection
+        goes to the data source.
+        """
+        # Default implementation: nothing is cached
+        pass
+
     def preserve_sensitive_fields(
         self, new_config: dict[str, Any], existing_config: dict[str, Any]
     ) -> dict[str, Any]:
@@ -159,21 +186,32 @@ class ConnectionRegistry:
             @ConnectionRegistry.register(DataSourceType.POSTGRES)
             class PostgresConnection(BaseConnection):
                 ...
+
+        Raises:
+            ValueError: If a connection class is already registered for the type
         """
 
         def decorator(connection_class: type[BaseConnection]):
+            existing = cls._registry.get(connection_type)
+            if existing is not None:
+                raise ValueError(
+                    f"Connection type {connection_type.value} is already registered "
+                    f"to {existing.__name__}"
+                )
             cls._registry[connection_type] = connection_class
             return connection_class
 
         return decorator
 
     @classmethod
-    def get(cls, connection_type: DataSourceType) -> Optional[type[BaseConnection]]:
+    def get(
+        cls, connection_type: DataSourceType | DataSourceLiteral
+    ) -> Optional[type[BaseConnection]]:
         """Get the connection class for a given type."""
         return cls._registry.get(connection_type)
 
     @classmethod
-    def is_supported(cls, connection_type: DataSourceType) -> bool:
+    def is_supported(cls, connection_type: DataSourceType | DataSourceLiteral) -> bool:
         """Check if a connection type is supported."""
         return connection_type in cls._registry
 
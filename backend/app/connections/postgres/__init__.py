@@ -1,6 +1,11 @@
 """PostgreSQL connection module."""
 
-from datetime import datetime
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
 from typing import Any, Optional
 
 import duckdb
@@ -12,18 +17,52 @@ from app.models.schemas import (
     PostgresConnectionConfig,
     TableSchema,
 )
+from app.services.duckdb_manager import rows_to_dicts, sql_literal
 from app.services.metadata_collectors import PostgresMetadataCollector
 
+# Key function for grouping information_schema rows by table name
+_TABLE_NAME_KEY = itemgetter(0)
+
+# Name of the DuckDB secret holding the PostgreSQL credentials
+_PG_SECRET_NAME = "pg_secret"
+
+# Seconds that collected metadata is served from cache before hitting PostgreSQL again
+_METADATA_CACHE_TTL = 60.0
+
+# Maximum number of table detail entries kept across all connections
+_TABLE_DETAILS_CACHE_SIZE = 256
+
+
+def _copy_table_details(table_details: dict[str, Any]) -> dict[str, Any]:
+    """Copy cached table details down to the column dicts."""
+    return {**table_details, "columns": [dict(col) for col in table_details["columns"]]}
+
 
 @ConnectionRegistry.register(DataSourceType.POSTGRES)
 class PostgresConnection(BaseConnection):
     """PostgreSQL data source using DuckDB's postgres extension."""
 
+    __slots__ = ("postgres_config", "duckdb_conn", "_cache_key")
+
+    # Metadata caches are shared across instances because connections are
+    # instantiated per request. Keys start with (connection_id, config_hash).
+    _metadata_cache: dict[tuple[str, int], tuple[float, ConnectionMetadataLite]] = {}
+    # One lock per connection_id, so config edits don't add entries
+    _metadata_locks: dict[str, asyncio.Lock] = {}
+    # Bumped per connection_id by invalidate_cache(); a fetch that started before
+    # an invalidation doesn't store its (possibly stale) result
+    _cache_generations: dict[str, int] = {}
+    _table_details_cache: OrderedDict[tuple[str, int, str, str], tuple[float, dict[str, Any]]] = (
+        OrderedDict()
+    )
+
     def __init__(self, connection_id: str, connection_name: str, config: dict[str, Any]):
         super().__init__(connection_id, connection_name, config)
         # Parse and validate config using Pydantic
         self.postgres_config = PostgresConnectionConfig(**config)
         self.duckdb_conn: Optional[duckdb.DuckDBPyConnection] = None
+        # Cache key prefix, so config changes never serve stale metadata
+        self._cache_key = (connection_id, hash(self.postgres_config.model_dump_json()))
 
     async def connect(self) -> bool:
         """Connect to PostgreSQL using DuckDB."""
@@ -35,27 +74,27 @@ class PostgresConnection(BaseConnection):
             self.duckdb_conn.execute("INSTALL postgres")
             self.duckdb_conn.execute("LOAD postgres")
 
+            # Store credentials in a secret so they never appear in the ATTACH string
+            config = self.postgres_config
+            create_secret_query = f"""
+                CREATE OR REPLACE TEMPORARY SECRET {_PG_SECRET_NAME} (
+                    TYPE POSTGRES,
+                    HOST {sql_literal(config.host)},
+                    PORT {int(config.port)},
+                    DATABASE {sql_literal(config.database)},
+                    USER {sql_literal(config.username)},
+                    PASSWORD {sql_literal(config.password)}
+                )
+            """
+            self.duckdb_conn.execute(create_secret_query)
+
             # Attach PostgreSQL database
-            if self.postgres_config.schema_names and len(self.postgres_config.schema_names) == 1:
+            attach_options = f"TYPE POSTGRES, SECRET {_PG_SECRET_NAME}"
+            if config.schema_names and len(config.schema_names) == 1:
                 # Single schema: use SCHEMA parameter
-                attach_query = f"""
-                    ATTACH 'host={self.postgres_config.host}
-                    port={self.postgres_config.port}
-                    dbname={self.postgres_config.database}
-                    user={self.postgres_config.username}
-                    password={self.postgres_config.password}'
-                    AS pg (TYPE POSTGRES, SCHEMA '{self.postgres_config.schema_names[0]}')
-                """
-            else:
-                # No schemas or multiple schemas: omit SCHEMA parameter
-                attach_query = f"""
-                    ATTACH 'host={self.postgres_config.host}
-                    port={self.postgres_config.port}
-                    dbname={self.postgres_config.database}
-                    user={self.postgres_config.username}
-                    password={self.postgres_config.password}'
-                    AS pg (TYPE POSTGRES)
-                """
+                attach_options += f", SCHEMA {sql_literal(config.schema_names[0])}"
+            # No schemas or multiple schemas: omit SCHEMA parameter
+            attach_query = f"ATTACH '' AS pg ({attach_options})"
             self.duckdb_conn.execute(attach_query)
 
             return True
@@ -77,7 +116,7 @@ class PostgresConnection(BaseConnection):
 
         result = self.duckdb_conn.execute(query)
         columns = [desc[0] for desc in result.description]
-        rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        rows = rows_to_dicts(columns, result.fetchall())
 
         return columns, rows
 
@@ -103,23 +142,15 @@ class PostgresConnection(BaseConnection):
         result = self.duckdb_conn.execute(query)
         rows = result.fetchall()
 
-        # Group columns by table
-        tables_dict: dict[str, list[dict[str, str]]] = {}
-        for row in rows:
-            table_name, column_name, data_type, is_nullable = row
-            if table_name not in tables_dict:
-                tables_dict[table_name] = []
-            tables_dict[table_name].append(
-                {
-                    "name": column_name,
-                    "type": data_type,
-                    "nullable": "YES" if is_nullable == "YES" else "NO",
-                }
-            )
+        # Split columns by table into parallel lists (rows are already ordered by table_name)
+        tables_dict: dict[str, tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]] = {}
+        for table_name, table_rows in groupby(rows, key=_TABLE_NAME_KEY):
+            _, column_names, data_types, nullables = zip(*table_rows)
+            tables_dict[table_name] = (column_names, data_types, nullables)
 
         # Create TableSchema objects with fully qualified names
         schemas = []
-        for table_name, columns in tables_dict.items():
+        for table_name, (column_names, data_types, nullables) in tables_dict.items():
             # Get row count for each table
             try:
                 count_result = self.duckdb_conn.execute(
@@ -134,7 +165,9 @@ class PostgresConnection(BaseConnection):
             schemas.append(
                 TableSchema(
                     table_name=full_table_name,
-                    columns=columns,
+                    column_names=column_names,
+                    column_types=data_types,
+                    column_nullable=[nullable == "YES" for nullable in nullables],
                     row_count=row_count,
                 )
             )
@@ -143,8 +176,7 @@ class PostgresConnection(BaseConnection):
 
     async def get_metadata_lite(self) -> list[dict[str, str]]:
         """Get lightweight metadata (table/schema names only) from PostgreSQL."""
-        collector = PostgresMetadataCollector(self.postgres_config)
-        metadata = await collector.collect_metadata(self.connection_id, self.connection_name)
+        metadata = await self.collect_metadata()
 
         # Flatten to list of {schema_name, table_name} dicts
         result = []
@@ -154,14 +186,35 @@ class PostgresConnection(BaseConnection):
         return result
 
     async def collect_metadata(self) -> ConnectionMetadataLite:
-        """Collect full lightweight metadata structure from PostgreSQL."""
-        collector = PostgresMetadataCollector(self.postgres_config)
-        metadata = await collector.collect_metadata(self.connection_id, self.connection_name)
+        """Collect full lightweight metadata structure from PostgreSQL.
 
-        # Set timestamp
-        metadata.last_updated = datetime.utcnow().isoformat()
+        Results are cached for a short TTL so back-to-back calls for the same
+        connection share a single round-trip to PostgreSQL.
+        """
+        cache_key = self._cache_key
+        cached = self._metadata_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _METADATA_CACHE_TTL:
+            return cached[1]
+
+        lock = self._metadata_locks.setdefault(self.connection_id, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed the cache while we waited
+            cached = self._metadata_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < _METADATA_CACHE_TTL:
+                return cached[1]
+
+            generation = self._cache_generations.get(self.connection_id, 0)
+            collector = PostgresMetadataCollector(self.postgres_config)
+            metadata = await collector.collect_metadata(self.connection_id, self.connection_name)
+
+            # Set timestamp (metadata models are frozen, so stamp a copy)
+            metadata = metadata.model_copy(
+                update={"last_updated": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+            )
 
-        return metadata
+            if self._cache_generations.get(self.connection_id, 0) == generation:
+                self._metadata_cache[cache_key] = (time.monotonic(), metadata)
+            return metadata
 
     def attach_to_duckdb(self, duckdb_manager) -> str:
         """Attach PostgreSQL connection to DuckDB for query execution."""
@@ -172,12 +225,22 @@ class PostgresConnection(BaseConnection):
         )
 
     async def get_table_details(self, schema_name: str, table_name: str) -> dict[str, Any]:
-        """Get detailed metadata for a specific table."""
+        """Get detailed metadata for a specific table (cached for a short TTL).
+
+        Returns a copy, so callers may modify it without affecting the cache.
+        """
+        cache_key = (*self._cache_key, schema_name, table_name)
+        cached = self._table_details_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _METADATA_CACHE_TTL:
+            self._table_details_cache.move_to_end(cache_key)
+            return _copy_table_details(cached[1])
+
+        generation = self._cache_generations.get(self.connection_id, 0)
         collector = PostgresMetadataCollector(self.postgres_config)
         table_metadata = await collector.get_table_details(schema_name, table_name)
 
         # Convert to dict
-        return {
+        table_details = {
             "name": table_metadata.name,
             "schema_name": table_metadata.schema_name,
             "columns": [
@@ -192,6 +255,27 @@ class PostgresConnection(BaseConnection):
             "row_count": table_metadata.row_count,
         }
 
+        if self._cache_generations.get(self.connection_id, 0) == generation:
+            self._table_details_cache[cache_key] = (time.monotonic(), table_details)
+            self._table_details_cache.move_to_end(cache_key)
+            if len(self._table_details_cache) > _TABLE_DETAILS_CACHE_SIZE:
+                self._table_details_cache.popitem(last=False)
+
+        return _copy_table_details(table_details)
+
+    def invalidate_cache(self) -> None:
+        """Drop cached metadata and table details for this connection.
+
+        Fetches already in flight finish but don't store their results. The
+        metadata lock is kept, so a new fetch still waits for a running one.
+        """
+        for cache in (self._metadata_cache, self._table_details_cache):
+            for key in [key for key in cache if key[0] == self.connection_id]:
+                del cache[key]
+        self._cache_generations[self.connection_id] = (
+            self._cache_generations.get(self.connection_id, 0) + 1
+        )
+
     async def cleanup(self, duckdb_manager) -> None:
         """Cleanup PostgreSQL connection from DuckDB."""
         # For PostgreSQL, we detach from the persistent DuckDB instance
@@ -199,6 +283,7 @@ class PostgresConnection(BaseConnection):
         if identifier:
             duckdb_manager.detach_source(identifier)
             duckdb_manager.remove_connection_from_cache(self.connection_id)
+        self.invalidate_cache()
 
     def preserve_sensitive_fields(
         self, new_config: dict[str, Any], existing_config: dict[str, Any]
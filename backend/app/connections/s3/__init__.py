@@ -1,16 +1,43 @@
 """AWS S3 connection module."""
 
-from datetime import datetime
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any
 
+import boto3
+from botocore.client import Config
+from botocore.exceptions import ClientError, NoCredentialsError
+
 from app.connections import BaseConnection, ConnectionRegistry
 from app.models.schemas import (
+    S3_CONNECTION_CONFIG_ADAPTER,
     ConnectionMetadataLite,
     DataSourceType,
     S3ConnectionConfig,
     TableSchema,
 )
-from app.services.duckdb_manager import get_duckdb_manager
+from app.services.duckdb_manager import clean_endpoint_url, get_duckdb_manager, rows_to_dicts
+
+# Worker threads for blocking DuckDB calls, sized like DuckDB's default `threads` setting
+_duckdb_executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="s3-duckdb")
+
+# Rows fetched per round-trip when streaming query results
+STREAM_BATCH_SIZE = 2048
+
+
+@lru_cache(maxsize=256)
+def _parse_s3_config(connection_id: str, config_json: str) -> S3ConnectionConfig:
+    """Validate an S3 config once per (connection, config) pair.
+
+    Connection objects are recreated per request from the same stored config, so
+    the validated model is shared between them. It must be treated as read-only.
+    """
+    return S3_CONNECTION_CONFIG_ADAPTER.validate_json(config_json)
 
 
 @ConnectionRegistry.register(DataSourceType.S3)
@@ -23,72 +50,30 @@ class S3Connection(BaseConnection):
     s3:// paths in their SQL queries (e.g., SELECT * FROM read_parquet('s3://bucket/file.parquet')).
     """
 
+    __slots__ = ("s3_config", "_duckdb_manager")
+
     def __init__(self, connection_id: str, connection_name: str, config: dict[str, Any]):
         super().__init__(connection_id, connection_name, config)
-        # Parse and validate config using Pydantic
-        self.s3_config = S3ConnectionConfig(**config)
+        # Parse and validate config using Pydantic (cached across instances)
+        self.s3_config = _parse_s3_config(connection_id, json.dumps(config, sort_keys=True))
+        # Resolve the DuckDB manager once instead of on every call
+        self._duckdb_manager = get_duckdb_manager()
 
     async def connect(self) -> bool:
         """Configure S3 credentials in DuckDB and validate bucket exists."""
         try:
-            import boto3
-            from botocore.exceptions import ClientError, NoCredentialsError
-
             # First, validate that the bucket exists using boto3
-            session_kwargs: dict[str, Any] = {"region_name": self.s3_config.region or "us-east-1"}
-
-            # Configure credentials based on credential type
-            if self.s3_config.credential_type == "manual":
-                session_kwargs["aws_access_key_id"] = self.s3_config.aws_access_key_id
-                session_kwargs["aws_secret_access_key"] = self.s3_config.aws_secret_access_key
-                if self.s3_config.aws_session_token:
-                    session_kwargs["aws_session_token"] = self.s3_config.aws_session_token
-
-            session = boto3.Session(**session_kwargs)
-
-            # Configure S3 client with optional custom endpoint
-            client_kwargs: dict[str, Any] = {}
-            if self.s3_config.endpoint_url:
-                import re
-
-                from botocore.client import Config
-
-                # Strip whitespace and remove invisible characters
-                endpoint_url = self.s3_config.endpoint_url.strip()
-                endpoint_url = re.sub(r"[\u200B-\u200D\uFEFF\u2060]", "", endpoint_url)
-                client_kwargs["endpoint_url"] = endpoint_url
-                # Use path-style addressing for custom endpoints
-                client_kwargs["config"] = Config(s3={"addressing_style": "path"})
-
-            s3_client = session.client("s3", **client_kwargs)
-
-            # Validate bucket exists by checking if we can access it
-            try:
-                s3_client.head_bucket(Bucket=self.s3_config.bucket)
-            except ClientError as e:
-                error_code = e.response["Error"]["Code"]
-                if error_code == "404":
-                    self.connection_error = f"Bucket '{self.s3_config.bucket}' does not exist"
-                    return False
-                elif error_code == "403":
-                    self.connection_error = f"Access denied to bucket '{self.s3_config.bucket}'. Check your credentials and permissions."
-                    return False
-                else:
-                    self.connection_error = (
-                        f"Failed to access bucket: {e.response['Error']['Message']}"
-                    )
-                    return False
-            except NoCredentialsError:
-                self.connection_error = "AWS credentials not found or invalid"
+            if not self._validate_bucket():
                 return False
 
             # Now configure S3 credentials in DuckDB
-            duckdb_manager = get_duckdb_manager()
-            duckdb_manager.configure_s3_secret(
-                connection_id=self.connection_id,
-                connection_name=self.connection_name,
-                config=self.s3_config,
-                force_recreate=False,
+            await asyncio.get_running_loop().run_in_executor(
+                _duckdb_executor,
+                self._duckdb_manager.configure_s3_secret,
+                self.connection_id,
+                self.connection_name,
+                self.s3_config,
+                False,
             )
             return True
         except Exception as e:
@@ -96,6 +81,96 @@ class S3Connection(BaseConnection):
             print(f"Failed to configure S3 connection: {e}")
             return False
 
+    @classmethod
+    async def connect_all(cls, connections: list[BaseConnection]) -> list[bool]:
+        """
+        Validate buckets concurrently, then create all DuckDB secrets in one transaction.
+
+        Returns:
+            Success flags in the same order as connections
+        """
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(
+            *(
+                loop.run_in_executor(None, connection._validate_bucket)
+                for connection in connections
+            ),
+            return_exceptions=True,
+        )
+
+        results: list[bool] = []
+        for connection, outcome in zip(connections, outcomes):
+            if isinstance(outcome, Exception):
+                connection.connection_error = str(outcome)
+                outcome = False
+            results.append(outcome)
+
+        validated = [connection for connection, ok in zip(connections, results) if ok]
+        if not validated:
+            return results
+
+        duckdb_manager = get_duckdb_manager()
+        try:
+            await loop.run_in_executor(
+                _duckdb_executor,
+                duckdb_manager.configure_s3_secrets_bulk,
+                [(c.connection_id, c.connection_name, c.s3_config) for c in validated],
+            )
+        except Exception as e:
+            # The transaction was rolled back, so none of the secrets exist
+            for connection in validated:
+                connection.connection_error = str(e)
+            return [False] * len(connections)
+
+        return results
+
+    def _validate_bucket(self) -> bool:
+        """
+        Check that the configured bucket exists and is accessible.
+
+        Returns:
+            True if the bucket is accessible. If False, connection_error is set.
+        """
+        session_kwargs: dict[str, Any] = {"region_name": self.s3_config.region or "us-east-1"}
+
+        # Configure credentials based on credential type
+        if self.s3_config.credential_type == "manual":
+            session_kwargs["aws_access_key_id"] = self.s3_config.aws_access_key_id
+            session_kwargs["aws_secret_access_key"] = self.s3_config.aws_secret_access_key
+            if self.s3_config.aws_session_token:
+                session_kwargs["aws_session_token"] = self.s3_config.aws_session_token
+
+        session = boto3.Session(**session_kwargs)
+
+        # Configure S3 client with optional custom endpoint
+        client_kwargs: dict[str, Any] = {}
+        if self.s3_config.endpoint_url:
+            # Strip whitespace and remove invisible characters
+            client_kwargs["endpoint_url"] = clean_endpoint_url(self.s3_config.endpoint_url)
+            # Use path-style addressing for custom endpoints
+            client_kwargs["config"] = Config(s3={"addressing_style": "path"})
+
+        s3_client = session.client("s3", **client_kwargs)
+
+        # Validate bucket exists by checking if we can access it
+        try:
+            s3_client.head_bucket(Bucket=self.s3_config.bucket)
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            if error_code == "404":
+                self.connection_error = f"Bucket '{self.s3_config.bucket}' does not exist"
+                return False
+            elif error_code == "403":
+                self.connection_error = f"Access denied to bucket '{self.s3_config.bucket}'. Check your credentials and permissions."
+                return False
+            else:
+                self.connection_error = f"Failed to access bucket: {e.response['Error']['Message']}"
+                return False
+        except NoCredentialsError:
+            self.connection_error = "AWS credentials not found or invalid"
+            return False
+        return True
+
     async def disconnect(self) -> None:
         """
         Disconnect from S3.
@@ -111,8 +186,40 @@ class S3Connection(BaseConnection):
 
         Example query: SELECT * FROM read_parquet('s3://my-bucket/data.parquet')
         """
-        duckdb_manager = get_duckdb_manager()
-        return duckdb_manager.execute_query(query)
+        # Run off the event loop so large S3 scans don't block other requests
+        return await asyncio.get_running_loop().run_in_executor(
+            _duckdb_executor, self._duckdb_manager.execute_query, query
+        )
+
+    async def execute_query_stream(
+        self, query: str, batch_size: int = STREAM_BATCH_SIZE
+    ) -> tuple[list[str], AsyncIterator[list[dict[str, Any]]]]:
+        """
+        Execute a SQL query that may reference S3 files and stream its rows.
+
+        The query runs before this returns, so SQL errors are raised here rather
+        than mid-stream. Rows are then fetched in batches on the worker pool,
+        keeping memory bounded by the batch size instead of the result size.
+
+        Returns:
+            Tuple of (column_names, async iterator of row batches)
+        """
+        loop = asyncio.get_running_loop()
+        cursor = await loop.run_in_executor(
+            _duckdb_executor, self._duckdb_manager.execute_query_cursor, query
+        )
+        columns = [desc[0] for desc in cursor.description]
+
+        async def batches() -> AsyncIterator[list[dict[str, Any]]]:
+            try:
+                while rows := await loop.run_in_executor(
+                    _duckdb_executor, cursor.fetchmany, batch_size
+                ):
+                    yield rows_to_dicts(columns, rows)
+            finally:
+                cursor.close()
+
+        return columns, batches()
 
     async def get_schema(self) -> list[TableSchema]:
         """
@@ -145,7 +252,7 @@ class S3Connection(BaseConnection):
             connection_name=self.connection_name,
             source_type=DataSourceType.S3,
             schemas=[],
-            last_updated=datetime.utcnow().isoformat(),
+            last_updated=datetime.now(timezone.utc).isoformat(timespec="seconds"),
         )
 
     def attach_to_duckdb(self, duckdb_manager) -> str:
@@ -174,7 +281,9 @@ class S3Connection(BaseConnection):
         # For S3, we drop the secret from the persistent DuckDB instance
         identifier = duckdb_manager.get_attached_identifier(self.connection_id)
         if identifier:
-            duckdb_manager.drop_secret(identifier)
+            await asyncio.get_running_loop().run_in_executor(
+                _duckdb_executor, duckdb_manager.drop_secret, identifier
+            )
             duckdb_manager.remove_connection_from_cache(self.connection_id)
 
     def preserve_sensitive_fields(
@@ -1,53 +1,13 @@
+import asyncio
 import logging
+import logging.config
 import os
 import sys
 from contextlib import asynccontextmanager
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
-
-# Fix SSL certificates and HTTP compression for PyInstaller bundles
-# This must be done before any imports that use SSL/HTTP (httpx, openai, litellm, etc.)
-def _setup_pyinstaller_fixes():
-    """Configure SSL certificates and fix HTTP issues for PyInstaller bundles."""
-    if not getattr(sys, "frozen", False):
-        return
-
-    # Running in a PyInstaller bundle
-    bundle_dir = sys._MEIPASS
-
-    # 1. Configure SSL certificates
-    cert_path = os.path.join(bundle_dir, "certifi", "cacert.pem")
-    if os.path.exists(cert_path):
-        os.environ["SSL_CERT_FILE"] = cert_path
-        os.environ["REQUESTS_CA_BUNDLE"] = cert_path
-        print(f"🔐 SSL certificates configured: {cert_path}")
-    else:
-        print(f"⚠️ SSL certificate bundle not found at: {cert_path}")
-
-    # 2. Disable HTTP compression for PyInstaller bundles
-    # This prevents "Error -3 while decompressing data: incorrect header check"
-    # by telling httpx to not request compressed responses
-    try:
-        import httpx._client
-
-        # Change Accept-Encoding from "gzip, deflate" to "identity"
-        # This tells the server to send uncompressed responses
-        httpx._client.ACCEPT_ENCODING = "identity"
-        print("📦 HTTP compression disabled for PyInstaller compatibility")
-    except Exception as e:
-        print(f"⚠️ Failed to disable HTTP compression: {e}")
-
-
-_setup_pyinstaller_fixes()
-
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-from app.api import connections, files, metadata, query, s3
-from app.api import settings as settings_api
 from app.config.settings import get_settings
-from app.services.migration_service import run_migrations
 
 # Get settings to configure logging
 settings = get_settings()
@@ -83,43 +43,101 @@ file_handler.setLevel(log_level)
 file_handler.setFormatter(logging.Formatter(log_format, datefmt=log_datefmt))
 root_logger.addHandler(file_handler)
 
-# Set specific loggers to appropriate levels
-logging.getLogger("uvicorn").setLevel(logging.INFO)
-logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-
-# Reduce LiteLLM noise - keep only important messages
-logging.getLogger("LiteLLM").setLevel(logging.INFO)
-logging.getLogger("openai").setLevel(logging.WARNING)
-logging.getLogger("httpx").setLevel(logging.WARNING)
-logging.getLogger("httpcore").setLevel(logging.WARNING)
+# Set specific loggers to appropriate levels in one pass. Incremental mode only
+# updates levels, leaving the root handlers configured above in place.
+logging.config.dictConfig(
+    {
+        "version": 1,
+        "incremental": True,
+        "loggers": {
+            "uvicorn": {"level": "INFO"},
+            "uvicorn.access": {"level": "WARNING"},
+            # Reduce LiteLLM noise - keep only important messages
+            "LiteLLM": {"level": "INFO"},
+            "openai": {"level": "WARNING"},
+            "httpx": {"level": "WARNING"},
+            "httpcore": {"level": "WARNING"},
+        },
+    }
+)
 
 # Create logger for main module
 logger = logging.getLogger(__name__)
 
+# PyInstaller extraction directory, or None when running from source
+_BUNDLE_DIR: str | None = getattr(sys, "_MEIPASS", None) if getattr(sys, "frozen", False) else None
+
+
+# Fix SSL certificates and HTTP compression for PyInstaller bundles
+# This must be done before any imports that use SSL/HTTP (httpx, openai, litellm, etc.)
+def _setup_pyinstaller_fixes(bundle_dir: str) -> None:
+    """Configure SSL certificates and fix HTTP issues for PyInstaller bundles.
+
+    Args:
+        bundle_dir: PyInstaller extraction directory (sys._MEIPASS)
+    """
+    # 1. Configure SSL certificates
+    cert_path = os.path.join(bundle_dir, "certifi", "cacert.pem")
+    if os.path.isfile(cert_path):
+        os.environ["SSL_CERT_FILE"] = cert_path
+        os.environ["REQUESTS_CA_BUNDLE"] = cert_path
+        logger.info(f"SSL certificates configured: {cert_path}")
+    else:
+        logger.warning(f"SSL certificate bundle not found at: {cert_path}")
+
+    # 2. Disable HTTP compression for PyInstaller bundles
+    # This prevents "Error -3 while decompressing data: incorrect header check"
+    # by telling httpx to not request compressed responses
+    try:
+        import httpx._client
+
+        # Change Accept-Encoding from "gzip, deflate" to "identity"
+        # This tells the server to send uncompressed responses
+        httpx._client.ACCEPT_ENCODING = "identity"
+        logger.info("HTTP compression disabled for PyInstaller compatibility")
+    except Exception as e:
+        logger.warning(f"Failed to disable HTTP compression: {e}")
+
+
+# Only bundles need the fixes; source runs skip the httpx import entirely
+if _BUNDLE_DIR is not None:
+    _setup_pyinstaller_fixes(_BUNDLE_DIR)
+
+from fastapi import FastAPI
+
+from app.api import connections, files, metadata, query, s3
+from app.api import settings as settings_api
+from app.middleware.cors import LightCORSMiddleware
+from app.services.ai_service import close_ai_http_client, close_llm_cache
+from app.services.connection_repository import connection_repository
+from app.services.migration_service import run_migrations
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager for the FastAPI application."""
     # Startup
-    print("🚀 Starting QBox API...")
+    logger.info("Starting QBox API...")
 
-    # Run database migrations
-    print("🔄 Checking database migrations...")
+    # Run database migrations on a worker thread so SQLite I/O doesn't block the loop
+    logger.info("Checking database migrations...")
     try:
-        applied = run_migrations()
+        applied = await asyncio.to_thread(run_migrations)
         if applied > 0:
-            print(f"✅ Applied {applied} database migration(s)")
+            logger.info(f"Applied {applied} database migration(s)")
         else:
-            print("✅ Database schema is up to date")
+            logger.info("Database schema is up to date")
     except Exception as e:
-        print(f"⚠️  WARNING: Migration error: {e}")
-        logger.exception("Migration failed")
+        logger.exception(f"Migration failed: {e}")
         # Continue startup - this ensures backward compatibility
 
     logger.info(f"Logging level: {settings.LOG_LEVEL}")
     yield
     # Shutdown
-    print("👋 Shutting down QBox API...")
+    logger.info("Shutting down QBox API...")
+    await close_ai_http_client()
+    connection_repository.close()
+    close_llm_cache()
 
 
 # Create FastAPI application
@@ -130,9 +148,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Configure CORS
+# Configure CORS (pure ASGI, preflights are answered without entering the app)
 app.add_middleware(
-    CORSMiddleware,
+    LightCORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
@@ -171,13 +189,20 @@ async def health_check():
 
 # Entry point for PyInstaller executable
 if __name__ == "__main__":
+    import importlib.util
+
     import uvicorn
 
     # Get port from environment variable (set by Electron) or default to 8080
     port = int(os.environ.get("PORT", 8080))
     host = os.environ.get("HOST", "127.0.0.1")
 
-    print(f"🚀 Starting QBox Backend on {host}:{port}")
+    logger.info(f"Starting QBox Backend on {host}:{port}")
+
+    # The single worker should use the fastest event loop and HTTP parser available.
+    # Pick them explicitly so frozen builds don't depend on uvicorn's import probing.
+    loop = "uvloop" if sys.platform != "win32" and importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
 
     # Run uvicorn server
     uvicorn.run(
@@ -187,4 +212,6 @@ if __name__ == "__main__":
         log_level="info",
         # Single worker to avoid DuckDB concurrency issues
         workers=1,
+        loop=loop,
+        http=http,
     )
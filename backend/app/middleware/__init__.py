@@ -0,0 +1 @@
+"""ASGI middleware package."""
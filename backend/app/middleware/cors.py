@@ -0,0 +1,183 @@
+"""Pure ASGI CORS middleware for QBox."""
+
+from collections.abc import Sequence
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+SAFELISTED_HEADERS = frozenset({"accept", "accept-language", "content-language", "content-type"})
+
+
+class LightCORSMiddleware:
+    """CORS middleware implemented directly on the ASGI interface.
+
+    Mirrors the behavior of Starlette's CORSMiddleware for the options QBox uses,
+    but encodes all static header values once at startup and answers preflight
+    requests without invoking the application.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Sequence[str] = (),
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        allow_credentials: bool = False,
+        max_age: int = 600,
+    ) -> None:
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            allow_origins: Origins allowed to make cross-origin requests ("*" for any)
+            allow_methods: Methods allowed for cross-origin requests ("*" for any)
+            allow_headers: Request headers allowed for cross-origin requests ("*" for any)
+            allow_credentials: Whether cookies/credentials are allowed
+            max_age: Seconds browsers may cache a preflight response
+        """
+        self.app = app
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_headers = SAFELISTED_HEADERS | {header.lower() for header in allow_headers}
+        methods = ALL_METHODS if "*" in allow_methods else allow_methods
+        self.allow_methods = frozenset(method.encode("latin-1") for method in methods)
+        self.allow_credentials = allow_credentials
+        # Echo the request origin unless any origin is allowed without credentials
+        self.echo_origin = not self.allow_all_origins or allow_credentials
+
+        # Headers added to every allowed cross-origin response
+        self.simple_headers: list[tuple[bytes, bytes]] = []
+        if self.allow_all_origins and not allow_credentials:
+            self.simple_headers.append((b"access-control-allow-origin", b"*"))
+        if allow_credentials:
+            self.simple_headers.append((b"access-control-allow-credentials", b"true"))
+
+        # Static part of every preflight response
+        self.preflight_headers: list[tuple[bytes, bytes]] = [
+            *self.simple_headers,
+            (b"access-control-allow-methods", ", ".join(methods).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+        ]
+        if not self.allow_all_headers:
+            self.preflight_headers.append(
+                (
+                    b"access-control-allow-headers",
+                    ", ".join(sorted(self.allow_headers)).encode("latin-1"),
+                )
+            )
+        if self.echo_origin:
+            self.preflight_headers.append((b"vary", b"Origin"))
+
+        # Complete per-origin header sets for explicitly listed origins, so the
+        # hot path only has to look them up
+        self.origin_simple_headers: dict[bytes, tuple[tuple[bytes, bytes], ...]] = {}
+        self.origin_preflight_headers: dict[bytes, tuple[tuple[bytes, bytes], ...]] = {}
+        for origin in self.allow_origins:
+            self.origin_simple_headers[origin] = self._build_simple_headers(origin)
+            self.origin_preflight_headers[origin] = (
+                *self.preflight_headers,
+                *self._build_origin_header(origin),
+            )
+
+    def _build_origin_header(self, origin: bytes) -> tuple[tuple[bytes, bytes], ...]:
+        """Build the allow-origin header for an allowed origin."""
+        if self.echo_origin:
+            return ((b"access-control-allow-origin", origin),)
+        return ()
+
+    def _build_simple_headers(self, origin: bytes) -> tuple[tuple[bytes, bytes], ...]:
+        """Build the headers added to a simple response for an allowed origin."""
+        if self.echo_origin:
+            return (
+                *self.simple_headers,
+                (b"access-control-allow-origin", origin),
+                (b"vary", b"Origin"),
+            )
+        return tuple(self.simple_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight_response(origin, request_method, request_headers, send)
+            return
+
+        await self.app(scope, receive, self._wrap_send(send, origin))
+
+    async def _preflight_response(
+        self,
+        origin: bytes,
+        request_method: bytes,
+        request_headers: Optional[bytes],
+        send: Send,
+    ) -> None:
+        """Answer a CORS preflight request directly."""
+        failures = []
+        origin_headers = self.origin_preflight_headers.get(origin)
+        if origin_headers is not None:
+            headers = list(origin_headers)
+        elif self.allow_all_origins:
+            headers = [*self.preflight_headers, *self._build_origin_header(origin)]
+        else:
+            headers = list(self.preflight_headers)
+            failures.append("origin")
+
+        if request_method not in self.allow_methods:
+            failures.append("method")
+
+        if request_headers is not None:
+            if self.allow_all_headers:
+                # Mirror the requested headers back to the browser
+                headers.append((b"access-control-allow-headers", request_headers))
+            else:
+                for header in request_headers.decode("latin-1").split(","):
+                    header = header.strip().lower()
+                    if header and header not in self.allow_headers:
+                        failures.append("headers")
+                        break
+
+        if failures:
+            body = f"Disallowed CORS {', '.join(failures)}".encode()
+            status = 400
+        else:
+            body = b"OK"
+            status = 200
+
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    def _wrap_send(self, send: Send, origin: bytes) -> Send:
+        """Add CORS headers to the response start message of a simple request."""
+        cors_headers = self.origin_simple_headers.get(origin)
+        if cors_headers is None:
+            if not self.allow_all_origins:
+                return send
+            cors_headers = self._build_simple_headers(origin)
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        return send_with_cors
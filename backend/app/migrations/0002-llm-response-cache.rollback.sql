@@ -0,0 +1,4 @@
+-- Rollback: Drop the LLM response cache
+
+DROP INDEX IF EXISTS idx_llm_response_cache_expires_at;
+DROP TABLE IF EXISTS llm_response_cache;
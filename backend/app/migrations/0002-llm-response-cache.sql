@@ -0,0 +1,12 @@
+-- Persistent cache of parsed LLM responses (see app/services/llm_cache.py)
+-- depends: 0001-initial-schema
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    key TEXT PRIMARY KEY,
+    sql TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires_at
+    ON llm_response_cache(expires_at);
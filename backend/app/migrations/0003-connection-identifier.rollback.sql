@@ -0,0 +1,4 @@
+-- Rollback: Drop the connection identifier column
+
+DROP INDEX IF EXISTS idx_connections_identifier;
+ALTER TABLE connections DROP COLUMN identifier;
@@ -0,0 +1,8 @@
+-- Store each connection's DuckDB identifier so collision checks use an index
+-- Existing rows are backfilled by ConnectionRepository on first use
+-- depends: 0002-llm-response-cache
+
+ALTER TABLE connections ADD COLUMN identifier TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_connections_identifier
+    ON connections(identifier);
@@ -1,7 +1,83 @@
 from enum import Enum
-from typing import Any, Optional
+from typing import Annotated, Any, Literal, Self
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Discriminator,
+    Field,
+    Tag,
+    TypeAdapter,
+    computed_field,
+    model_validator,
+)
+
+__all__ = [
+    "CONNECTION_METADATA_LIST_ADAPTER",
+    "FILE_INFO_LIST_ADAPTER",
+    "QUERY_LIST_ADAPTER",
+    "QUERY_TABLE_SELECTION_LIST_ADAPTER",
+    "S3_CONNECTION_CONFIG_ADAPTER",
+    "AIQueryRequest",
+    "AIQueryResponse",
+    "AISettings",
+    "AISettingsUpdate",
+    "ChatMessage",
+    "ChatRequest",
+    "ChatResponse",
+    "ColumnMetadata",
+    "ConnectionConfig",
+    "ConnectionMetadataLite",
+    "ConnectionStatus",
+    "DataSourceLiteral",
+    "DataSourceType",
+    "FileInfo",
+    "FileMetadata",
+    "FileUploadResponse",
+    "PostgresConnectionConfig",
+    "Query",
+    "QueryCreate",
+    "QueryExecuteRequest",
+    "QueryExecuteResult",
+    "QueryExecutionRequest",
+    "QueryHistoryItem",
+    "QueryHistoryList",
+    "QueryNameUpdateRequest",
+    "QueryRequest",
+    "QueryResult",
+    "QueryResultErr",
+    "QueryResultOk",
+    "QuerySelections",
+    "QueryTableSelection",
+    "QueryTableSelectionRequest",
+    "QueryUpdateRequest",
+    "S3ConnectionConfig",
+    "S3DefaultCredentialsConfig",
+    "S3ManualCredentialsConfig",
+    "S3QueryRequest",
+    "SQLHistoryItem",
+    "SQLHistoryList",
+    "SQLHistoryRestoreRequest",
+    "SchemaMetadataLite",
+    "SchemaModel",
+    "TableMetadata",
+    "TableMetadataLite",
+    "TableSchema",
+]
+
+
+class SchemaModel(BaseModel):
+    """Base class for QBox API and config models."""
 
-from pydantic import BaseModel, Field, model_validator
+    @classmethod
+    def from_trusted(cls, **data: Any) -> Self:
+        """Build an instance from already-valid data without running validation.
+
+        Only for values produced by our own databases and services (e.g. rows
+        from SQLite, DuckDB or information_schema), where the types are known to
+        match. Missing fields get their defaults; unknown keys are dropped.
+        """
+        return cls.model_construct(**data)
 
 
 class DataSourceType(str, Enum):
@@ -17,23 +93,39 @@ class DataSourceType(str, Enum):
     EXCEL = "excel"
 
 
-class ConnectionConfig(BaseModel):
+# Field annotation for data source types in request/response models. pydantic-core
+# validates literals with a set lookup, cheaper than coercing to the Enum.
+# Equal (and hash-equal) to the matching DataSourceType members.
+DataSourceLiteral = Literal["postgres", "s3", "mysql", "oracle", "dynamodb", "csv", "excel"]
+
+
+class ConnectionConfig(SchemaModel):
     """Base connection configuration."""
 
     name: str
-    type: DataSourceType
+    type: DataSourceLiteral
     config: dict[str, Any]
 
 
-class PostgresConnectionConfig(BaseModel):
+def _parse_schemas(value: str) -> list[str] | None:
+    """Split a comma-separated schema string, returning None if it names no schemas."""
+    parts = [part.strip() for part in value.split(",") if part.strip()]
+    return parts or None
+
+
+class PostgresConnectionConfig(SchemaModel):
     """PostgreSQL connection configuration."""
 
+    # Accept both the "schemas" alias and the "schema_names" field name. Schema
+    # building is deferred: configs are only validated when a connection is used
+    model_config = ConfigDict(populate_by_name=True, defer_build=True)
+
     host: str
     port: int = 5432
     database: str
     username: str
     password: str
-    schema_names: Optional[list[str]] = Field(default=None, alias="schemas")
+    schema_names: list[str] | None = Field(default=None, alias="schemas")
 
     @model_validator(mode="before")
     @classmethod
@@ -49,140 +141,190 @@ class PostgresConnectionConfig(BaseModel):
             # Handle legacy 'schema' field
             if "schema" in data and "schemas" not in data:
                 schema_value = data.pop("schema")
-                if schema_value and isinstance(schema_value, str) and schema_value.strip():
-                    if "," in schema_value:
-                        data["schemas"] = [s.strip() for s in schema_value.split(",") if s.strip()]
-                    else:
-                        data["schemas"] = [schema_value.strip()]
-                else:
-                    data["schemas"] = None
+                data["schemas"] = (
+                    _parse_schemas(schema_value) if isinstance(schema_value, str) else None
+                )
 
             # Handle 'schemas' as string (convert to list)
             elif "schemas" in data and isinstance(data["schemas"], str):
-                schema_value = data["schemas"]
-                if schema_value and schema_value.strip():
-                    if "," in schema_value:
-                        data["schemas"] = [s.strip() for s in schema_value.split(",") if s.strip()]
-                    else:
-                        data["schemas"] = [schema_value.strip()]
-                else:
-                    data["schemas"] = None
+                data["schemas"] = _parse_schemas(data["schemas"])
 
             # 'schemas' as list or None is already in correct format
 
         return data
 
 
-class S3ConnectionConfig(BaseModel):
-    """AWS S3 connection configuration."""
+class _S3ConnectionConfigBase(SchemaModel):
+    """Fields shared by all S3 connection configurations."""
 
     bucket: str
-    credential_type: str = Field(
-        default="default",
-        description="Either 'default' for AWS credential provider chain or 'manual' for explicit credentials",
-    )
-    # Manual credentials (only required if credential_type == 'manual')
-    aws_access_key_id: Optional[str] = None
-    aws_secret_access_key: Optional[str] = None
-    aws_session_token: Optional[str] = None
-    region: Optional[str] = Field(default="us-east-1", description="AWS region")
-    endpoint_url: Optional[str] = Field(
+    region: str | None = Field(default="us-east-1", description="AWS region")
+    endpoint_url: str | None = Field(
         default=None,
         description="Custom S3 endpoint URL (e.g., http://localhost:4566 for LocalStack)",
     )
 
-    @model_validator(mode="after")
-    def validate_credentials(self) -> "S3ConnectionConfig":
-        """Validate that manual credentials are provided when credential_type is 'manual'."""
-        if self.credential_type == "manual":
-            if not self.aws_access_key_id or not self.aws_secret_access_key:
-                raise ValueError(
-                    "aws_access_key_id and aws_secret_access_key are required when credential_type is 'manual'"
-                )
-        return self
 
+class S3DefaultCredentialsConfig(_S3ConnectionConfigBase):
+    """AWS S3 connection using the AWS credential provider chain."""
+
+    credential_type: Literal["default"] = "default"
+
+
+class S3ManualCredentialsConfig(_S3ConnectionConfigBase):
+    """AWS S3 connection with explicit credentials."""
 
-class ConnectionStatus(BaseModel):
+    credential_type: Literal["manual"]
+    aws_access_key_id: str = Field(min_length=1)
+    aws_secret_access_key: str = Field(min_length=1)
+    aws_session_token: str | None = None
+
+
+def _s3_credential_type(value: Any) -> str:
+    """Union tag for S3 configs; stored configs may omit credential_type."""
+    if isinstance(value, dict):
+        return value.get("credential_type", "default")
+    return getattr(value, "credential_type", "default")
+
+
+# AWS S3 connection configuration. Tagged on credential_type, so pydantic-core
+# picks the variant up front and reports missing manual credentials itself.
+S3ConnectionConfig = Annotated[
+    Annotated[S3DefaultCredentialsConfig, Tag("default")]
+    | Annotated[S3ManualCredentialsConfig, Tag("manual")],
+    Discriminator(_s3_credential_type),
+]
+
+# Validates raw S3 config dicts/JSON into the matching S3ConnectionConfig variant
+S3_CONNECTION_CONFIG_ADAPTER: TypeAdapter[S3ConnectionConfig] = TypeAdapter(S3ConnectionConfig)
+
+
+class ConnectionStatus(SchemaModel):
     """Connection status response."""
 
     success: bool
     message: str
-    connection_id: Optional[str] = None
+    connection_id: str | None = None
 
 
-class QueryRequest(BaseModel):
+class QueryRequest(SchemaModel):
     """Query execution request."""
 
     connection_id: str
     query: str
 
 
-class QueryResult(BaseModel):
-    """Query execution result."""
+class S3QueryRequest(SchemaModel):
+    """Request to run a SQL query against files in an S3 connection."""
 
-    success: bool
-    columns: Optional[list[str]] = None
-    rows: Optional[list[dict[str, Any]]] = None
-    row_count: Optional[int] = None
-    error: Optional[str] = None
+    query: str
+
+
+class QueryResultOk(SchemaModel):
+    """Successful query execution result."""
+
+    success: Literal[True] = True
+    columns: list[str]
+    rows: list[Any]  # Row dicts from DuckDB; Any skips per-row validation
+    row_count: int
+
+
+class QueryResultErr(SchemaModel):
+    """Failed query execution result."""
 
+    success: Literal[False] = False
+    error: str
 
-class ColumnMetadata(BaseModel):
+
+# Query execution result, discriminated on `success`
+QueryResult = Annotated[QueryResultOk | QueryResultErr, Field(discriminator="success")]
+
+
+class ColumnMetadata(SchemaModel):
     """Column metadata information."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str
     type: str
     nullable: bool = True
-    description: Optional[str] = None
+    description: str | None = None
     is_primary_key: bool = False
 
 
-class TableMetadata(BaseModel):
+class TableMetadata(SchemaModel):
     """Table metadata information (full details)."""
 
     name: str
-    schema_name: Optional[str] = None
-    columns: Optional[list[ColumnMetadata]] = None  # Optional for lazy loading
-    row_count: Optional[int] = None
-    description: Optional[str] = None
+    schema_name: str | None = None
+    columns: list[ColumnMetadata] | None = None  # Optional for lazy loading
+    row_count: int | None = None
+    description: str | None = None
 
 
-class TableMetadataLite(BaseModel):
+class TableMetadataLite(SchemaModel):
     """Lightweight table metadata (name only) for list endpoints."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str
-    schema_name: Optional[str] = None
+    schema_name: str | None = None
 
 
-class SchemaMetadataLite(BaseModel):
+class SchemaMetadataLite(SchemaModel):
     """Lightweight schema metadata for list endpoints."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str
     tables: list[TableMetadataLite]
 
 
-class ConnectionMetadataLite(BaseModel):
+class ConnectionMetadataLite(SchemaModel):
     """Lightweight connection metadata for list endpoints."""
 
+    model_config = ConfigDict(frozen=True)
+
     connection_id: str
     connection_name: str
-    source_type: DataSourceType
+    source_type: DataSourceLiteral
     schemas: list[SchemaMetadataLite]
-    last_updated: Optional[str] = None
+    last_updated: str | None = None
 
 
-class TableSchema(BaseModel):
-    """Table schema information (legacy, for backwards compatibility)."""
+# Serializes list responses straight to JSON bytes in pydantic-core
+CONNECTION_METADATA_LIST_ADAPTER = TypeAdapter(list[ConnectionMetadataLite])
+
+
+class TableSchema(SchemaModel):
+    """Table schema information (legacy, for backwards compatibility).
+
+    Columns are stored as parallel lists; ``columns`` rebuilds the legacy
+    list of dicts for serialization.
+    """
 
     table_name: str
-    columns: list[dict[str, str]]
-    row_count: Optional[int] = None
+    column_names: list[str]
+    column_types: list[str]
+    column_nullable: list[bool]
+    row_count: int | None = None
+
+    @computed_field
+    @property
+    def columns(self) -> list[dict[str, str]]:
+        """Columns as legacy {name, type, nullable} dicts."""
+        return [
+            {"name": name, "type": type_, "nullable": "YES" if nullable else "NO"}
+            for name, type_, nullable in zip(
+                self.column_names, self.column_types, self.column_nullable
+            )
+        ]
 
 
 # Query Models
 
 
-class Query(BaseModel):
+class Query(SchemaModel):
     """A query containing SQL text and selected tables."""
 
     id: str
@@ -192,14 +334,19 @@ class Query(BaseModel):
     updated_at: str
 
 
-class QueryCreate(BaseModel):
+# Validates a whole list of saved queries in a single pydantic-core call, and
+# serializes list responses straight to JSON bytes
+QUERY_LIST_ADAPTER = TypeAdapter(list[Query])
+
+
+class QueryCreate(SchemaModel):
     """Request to create a new query."""
 
     name: str
     sql_text: str = ""
 
 
-class QueryTableSelectionRequest(BaseModel):
+class QueryTableSelectionRequest(SchemaModel):
     """Request to add/remove a table from query."""
 
     connection_id: str
@@ -208,7 +355,7 @@ class QueryTableSelectionRequest(BaseModel):
     source_type: str = "connection"  # Default to 'connection' for backwards compatibility
 
 
-class QueryTableSelection(BaseModel):
+class QueryTableSelection(SchemaModel):
     """Represents a table selected in a query."""
 
     query_id: str
@@ -218,14 +365,18 @@ class QueryTableSelection(BaseModel):
     source_type: str = "connection"  # 'connection', 'file', 's3', etc.
 
 
-class QuerySelections(BaseModel):
+# Validates all table selections of a query in a single pydantic-core call
+QUERY_TABLE_SELECTION_LIST_ADAPTER = TypeAdapter(list[QueryTableSelection])
+
+
+class QuerySelections(SchemaModel):
     """All table selections in a query."""
 
     query_id: str
     selections: list[QueryTableSelection]
 
 
-class ChatMessage(BaseModel):
+class ChatMessage(SchemaModel):
     """A chat message in query conversation."""
 
     id: int
@@ -235,26 +386,26 @@ class ChatMessage(BaseModel):
     created_at: str
 
 
-class ChatRequest(BaseModel):
+class ChatRequest(SchemaModel):
     """Request to send a chat message."""
 
     message: str
 
 
-class ChatResponse(BaseModel):
+class ChatResponse(SchemaModel):
     """Response from chat interaction."""
 
     message: ChatMessage
     updated_sql: str
 
 
-class QueryUpdateRequest(BaseModel):
+class QueryUpdateRequest(SchemaModel):
     """Request to update query SQL."""
 
     sql_text: str
 
 
-class QueryNameUpdateRequest(BaseModel):
+class QueryNameUpdateRequest(SchemaModel):
     """Request to update query name."""
 
     name: str
@@ -263,58 +414,57 @@ class QueryNameUpdateRequest(BaseModel):
 # AI Query Models
 
 
-class AIQueryRequest(BaseModel):
+class AIQueryRequest(SchemaModel):
     """Request to generate SQL from natural language."""
 
+    model_config = ConfigDict(defer_build=True)
+
     prompt: str
-    additional_instructions: Optional[str] = None
+    additional_instructions: str | None = None
 
 
-class AIQueryResponse(BaseModel):
+class AIQueryResponse(SchemaModel):
     """Response with generated SQL and explanation."""
 
+    model_config = ConfigDict(defer_build=True)
+
     query_id: str
     generated_sql: str
-    explanation: Optional[str] = None
+    explanation: str | None = None
 
 
-class QueryExecutionRequest(BaseModel):
+class QueryExecutionRequest(SchemaModel):
     """Request to execute a SQL query."""
 
+    model_config = ConfigDict(defer_build=True)
+
     sql: str
     save_to_history: bool = True
-    query_id: Optional[str] = None  # Reference to AI-generated query
-
-
-class QueryExecutionResult(BaseModel):
-    """Result of query execution."""
-
-    success: bool
-    columns: Optional[list[str]] = None
-    rows: Optional[list[dict[str, Any]]] = None
-    row_count: Optional[int] = None
-    execution_time_ms: Optional[int] = None
-    error: Optional[str] = None
+    query_id: str | None = None  # Reference to AI-generated query
 
 
-class QueryHistoryItem(BaseModel):
+class QueryHistoryItem(SchemaModel):
     """A query history item."""
 
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     id: str
     query_id: str
     prompt: str
     generated_sql: str
-    executed_sql: Optional[str] = None
-    explanation: Optional[str] = None
-    row_count: Optional[int] = None
-    execution_time_ms: Optional[int] = None
-    error: Optional[str] = None
+    executed_sql: str | None = None
+    explanation: str | None = None
+    row_count: int | None = None
+    execution_time_ms: int | None = None
+    error: str | None = None
     created_at: str
 
 
-class QueryHistoryList(BaseModel):
+class QueryHistoryList(SchemaModel):
     """List of query history items."""
 
+    model_config = ConfigDict(defer_build=True)
+
     query_id: str
     queries: list[QueryHistoryItem]
     total: int
@@ -323,32 +473,36 @@ class QueryHistoryList(BaseModel):
 # Query Execution Models for Query Running
 
 
-class QueryExecuteRequest(BaseModel):
+class QueryExecuteRequest(SchemaModel):
     """Request to execute a query with pagination."""
 
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=100, ge=1, le=1000)
     sql_text: str  # Execute this SQL from the current editor
+    # "rows" returns a dict per row; "columns" returns one value list per column in `data`
+    layout: Literal["rows", "columns"] = "rows"
 
 
-class QueryExecuteResult(BaseModel):
+class QueryExecuteResult(SchemaModel):
     """Result of query execution with pagination."""
 
     success: bool
-    columns: Optional[list[str]] = None
-    rows: Optional[list[dict[str, Any]]] = None
-    total_rows: Optional[int] = None
+    columns: list[str] | None = None
+    rows: list[Any] | None = None  # Row dicts from DuckDB; Any skips per-row validation
+    data: list[list[Any]] | None = None  # Column-major values for layout="columns"
+    total_rows: int | None = None
     page: int
     page_size: int
-    total_pages: Optional[int] = None
-    execution_time_ms: Optional[float] = None
-    error: Optional[str] = None
+    total_pages: int | None = None
+    execution_time_us: int | None = None
+    execution_time_ms: float | None = Field(default=None, deprecated="Use execution_time_us")
+    error: str | None = None
 
 
 # SQL History Models
 
 
-class SQLHistoryItem(BaseModel):
+class SQLHistoryItem(SchemaModel):
     """A SQL history version."""
 
     id: int
@@ -357,14 +511,14 @@ class SQLHistoryItem(BaseModel):
     created_at: str
 
 
-class SQLHistoryList(BaseModel):
+class SQLHistoryList(SchemaModel):
     """List of SQL history versions."""
 
     query_id: str
     versions: list[SQLHistoryItem]
 
 
-class SQLHistoryRestoreRequest(BaseModel):
+class SQLHistoryRestoreRequest(SchemaModel):
     """Request to restore a SQL version from history."""
 
     history_id: int
@@ -373,30 +527,30 @@ class SQLHistoryRestoreRequest(BaseModel):
 # Settings Models
 
 
-class AISettings(BaseModel):
+class AISettings(SchemaModel):
     """AI configuration settings."""
 
-    openai_api_key: Optional[str] = None
-    anthropic_api_key: Optional[str] = None
-    gemini_api_key: Optional[str] = None
+    openai_api_key: str | None = None
+    anthropic_api_key: str | None = None
+    gemini_api_key: str | None = None
     ai_model: str = "gpt-4o"
     ai_temperature: float = 0.1
 
 
-class AISettingsUpdate(BaseModel):
+class AISettingsUpdate(SchemaModel):
     """Request to update AI settings (all fields optional)."""
 
-    openai_api_key: Optional[str] = None
-    anthropic_api_key: Optional[str] = None
-    gemini_api_key: Optional[str] = None
-    ai_model: Optional[str] = None
-    ai_temperature: Optional[float] = Field(default=None, ge=0.0, le=2.0)
+    openai_api_key: str | None = None
+    anthropic_api_key: str | None = None
+    gemini_api_key: str | None = None
+    ai_model: str | None = None
+    ai_temperature: float | None = Field(default=None, ge=0.0, le=2.0)
 
 
 # File Models
 
 
-class FileUploadResponse(BaseModel):
+class FileUploadResponse(SchemaModel):
     """Response after file upload."""
 
     id: str
@@ -407,9 +561,11 @@ class FileUploadResponse(BaseModel):
     created_at: str
 
 
-class FileInfo(BaseModel):
+class FileInfo(SchemaModel):
     """File information."""
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: str
     original_filename: str
@@ -419,12 +575,18 @@ class FileInfo(BaseModel):
     updated_at: str
 
 
-class FileMetadata(BaseModel):
+# Serializes list responses straight to JSON bytes in pydantic-core
+FILE_INFO_LIST_ADAPTER = TypeAdapter(list[FileInfo])
+
+
+class FileMetadata(SchemaModel):
     """File metadata with schema information."""
 
+    model_config = ConfigDict(frozen=True)
+
     file_id: str
     file_name: str
     file_type: str
     view_name: str
     columns: list[ColumnMetadata]
-    row_count: Optional[int] = None
+    row_count: int | None = None
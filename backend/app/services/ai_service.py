@@ -1,209 +1,106 @@
 """AI service for SQL query generation using LiteLLM."""
 
+import asyncio
+import hashlib
+import importlib.util
+import json
 import logging
 import os
+import random
+import re
 import time
-from typing import Any
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from functools import cache, lru_cache
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
 
-import litellm
-from litellm import acompletion
+from pydantic_core import to_json
 
 from app.config.settings import get_settings
+from app.services.llm_cache import (
+    CACHEABLE_MAX_TEMPERATURE,
+    InMemoryLRUCache,
+    LLMCache,
+    SemanticCache,
+    SQLiteCacheBackend,
+    TemplateCache,
+    cache_key,
+    extract_template,
+)
 from app.services.settings_repository import settings_repository
 
-logger = logging.getLogger(__name__)
-
-# Automatically drop unsupported parameters for different models
-# This handles temperature, top_p, etc. for models that don't support them
-litellm.drop_params = True
-
-
-class AIService:
-    """Service for AI-powered SQL generation and editing."""
-
-    def __init__(self, model: str, temperature: float = 0.1):
-        """
-        Initialize AI service.
-
-        Args:
-            model: Model to use (e.g., "gpt-4o", "claude-3-5-sonnet-20241022", "ollama/llama2")
-            temperature: Temperature for generation (0.0-2.0, lower = more deterministic)
-        """
-        self.model = model
-        self.temperature = temperature
-
-        # LiteLLM automatically reads API keys from environment variables
-        # No need to set them manually - they're already set by pydantic-settings
-
-    async def edit_sql_from_chat(
-        self,
-        current_sql: str,
-        user_message: str,
-        chat_history: list[Any],
-        query_metadata: list[dict[str, Any]],
-    ) -> dict[str, str]:
-        """
-        Edit SQL query based on chat conversation.
-
-        Args:
-            current_sql: Current state of the SQL query
-            user_message: Latest user message/instruction
-            chat_history: Previous chat messages
-            query_metadata: List of table metadata from query
-
-        Returns:
-            Dictionary with 'sql' and 'explanation' keys
-        """
-        logger.debug("=" * 80)
-        logger.debug("Starting edit_sql_from_chat")
-        logger.debug(f"Model: {self.model}, Temperature: {self.temperature}")
-        logger.debug(f"User message: {user_message}")
-        logger.debug(f"Current SQL length: {len(current_sql)} chars")
-        logger.debug(f"Chat history: {len(chat_history)} messages")
-        logger.debug(f"Query metadata: {len(query_metadata)} tables")
-
-        schema_context = self._format_schema_context(query_metadata)
-        system_prompt = self._build_chat_system_prompt(schema_context, current_sql)
-
-        logger.debug("-" * 80)
-        logger.debug("System prompt:")
-        logger.debug(system_prompt)
-        logger.debug("-" * 80)
-
-        # Build conversation history
-        messages = [{"role": "system", "content": system_prompt}]
-
-        # Add previous chat messages (last 10 for context)
-        context_messages = 0
-        for msg in chat_history[-10:]:
-            if hasattr(msg, "role") and hasattr(msg, "message"):
-                messages.append({"role": msg.role, "content": msg.message})
-                context_messages += 1
-
-        # Add current user message
-        messages.append({"role": "user", "content": user_message})
+if TYPE_CHECKING:
+    import aiohttp
 
-        logger.debug(
-            f"Total messages to LLM: {len(messages)} (system + {context_messages} context + 1 new)"
-        )
-
-        try:
-            logger.debug(f"Calling LLM ({self.model})...")
-            start_time = time.time()
-
-            # LiteLLM automatically handles provider differences
-            response = await acompletion(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-            )
-
-            elapsed_time = time.time() - start_time
-            logger.debug(f"LLM call completed in {elapsed_time:.2f} seconds")
-
-            content = response.choices[0].message.content or ""
-            logger.debug("-" * 80)
-            logger.debug("LLM Response:")
-            logger.debug(content)
-            logger.debug("-" * 80)
-
-            sql, explanation = self._parse_response(content)
-
-            logger.debug(f"Parsed SQL length: {len(sql)} chars")
-            logger.debug(
-                f"Explanation: {explanation[:100]}..."
-                if len(explanation) > 100
-                else f"Explanation: {explanation}"
-            )
-            logger.debug("=" * 80)
+logger = logging.getLogger(__name__)
 
-            return {"sql": sql or current_sql, "explanation": explanation}
+# Banners around the debug dumps of each LLM call
+_LOG_RULE = "=" * 80
+_LOG_SEPARATOR = "-" * 80
 
-        except Exception as e:
-            logger.error(f"LLM call failed after {time.time() - start_time:.2f}s: {e}")
-            logger.debug("=" * 80)
-            raise RuntimeError(f"Failed to edit SQL: {str(e)}")
+# Connection pool limits for the HTTP client shared by all LLM calls
+AI_HTTP_MAX_KEEPALIVE = 50
+AI_HTTP_MAX_CONNECTIONS = 100
+AI_HTTP_KEEPALIVE_EXPIRY = 60.0
+AI_HTTP_CONNECT_TIMEOUT = 5.0
+AI_HTTP_TIMEOUT = 600.0
 
-    async def generate_sql_from_prompt(
-        self,
-        prompt: str,
-        query_metadata: list[dict[str, Any]],
-        additional_instructions: str | None = None,
-    ) -> dict[str, str]:
-        """
-        Generate SQL query from natural language prompt.
+# Rendered system prompts kept per (schema context, extra input); a chat session
+# sends many messages against the same tables
+PROMPT_CACHE_SIZE = 128
 
-        Args:
-            prompt: Natural language query from user
-            query_metadata: List of table metadata from query
-            additional_instructions: Optional additional context
+# Parsed responses kept for identical (model, messages, temperature) LLM calls
+LLM_CACHE_SIZE = 512
+LLM_CACHE_TTL_SECONDS = 3600.0
+# Longer expiry when responses are kept in the database (AI_PERSISTENT_CACHE_ENABLED)
+LLM_PERSISTENT_CACHE_TTL_SECONDS = 86400.0
 
-        Returns:
-            Dictionary with 'sql' and 'explanation' keys
-        """
-        logger.debug("=" * 80)
-        logger.debug("Starting generate_sql_from_prompt")
-        logger.debug(f"Model: {self.model}, Temperature: {self.temperature}")
-        logger.debug(f"Prompt: {prompt}")
-        logger.debug(f"Query metadata: {len(query_metadata)} tables")
-        logger.debug(f"Additional instructions: {additional_instructions}")
+# Prompt embeddings kept for the (optional) semantic response cache
+SEMANTIC_CACHE_SIZE = 256
 
-        schema_context = self._format_schema_context(query_metadata)
-        system_prompt = self._build_system_prompt(schema_context, additional_instructions)
+# Rendered schema contexts kept for metadata seen in recent requests
+SCHEMA_CONTEXT_CACHE_SIZE = 64
 
-        logger.debug("-" * 80)
-        logger.debug("System prompt:")
-        logger.debug(system_prompt)
-        logger.debug("-" * 80)
+# Chat edit templates kept for messages that differ only in literal values
+TEMPLATE_CACHE_SIZE = 256
 
-        try:
-            logger.debug(f"Calling LLM ({self.model})...")
-            start_time = time.time()
-
-            # LiteLLM automatically handles provider differences
-            response = await acompletion(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=self.temperature,
-            )
+# Chat history sent with each edit: the most recent messages, up to this many,
+# that fit in the token budget
+CHAT_HISTORY_MAX_MESSAGES = 10
+CHAT_HISTORY_TOKEN_BUDGET = 4000
 
-            elapsed_time = time.time() - start_time
-            logger.debug(f"LLM call completed in {elapsed_time:.2f} seconds")
+# Token counts kept per (model, text); chat history is re-counted on every message
+TOKEN_COUNT_CACHE_SIZE = 1024
 
-            content = response.choices[0].message.content or ""
-            logger.debug("-" * 80)
-            logger.debug("LLM Response:")
-            logger.debug(content)
-            logger.debug("-" * 80)
+# Retries for transient provider errors (rate limits, 5xx, connection failures),
+# with full-jitter exponential backoff between attempts
+AI_MAX_RETRIES = 3
+AI_RETRY_BASE_DELAY = 1.0
+AI_RETRY_MAX_DELAY = 10.0
 
-            sql, explanation = self._parse_response(content)
+# LLM calls allowed in flight at once when generating SQL for several prompts
+AI_MAX_CONCURRENT_REQUESTS = 8
 
-            logger.debug(f"Parsed SQL length: {len(sql)} chars")
-            logger.debug(
-                f"Explanation: {explanation[:100]}..."
-                if len(explanation) > 100
-                else f"Explanation: {explanation}"
-            )
-            logger.debug("=" * 80)
+# Lines dropped from assistant messages in chat history: log lines, rules and blanks
+_HISTORY_NOISE_LINE_RE = re.compile(r"\s*(?:(?:INFO|DEBUG)\b|-{3,}\s*$|$)")
 
-            return {"sql": sql, "explanation": explanation}
+# Unfenced SQL: a line starting with SELECT (any case) and the non-blank lines after it
+_SELECT_BLOCK_RE = re.compile(r"^[^\S\n]*SELECT[^\n]*(?:\n(?![^\S\n]*$)[^\n]*)*", re.I | re.M)
 
-        except Exception as e:
-            logger.error(f"LLM call failed after {time.time() - start_time:.2f}s: {e}")
-            logger.debug("=" * 80)
-            raise RuntimeError(f"Failed to generate SQL: {str(e)}")
 
-    def _build_system_prompt(
-        self, schema_context: str, additional_instructions: str | None = None
-    ) -> str:
-        """Build the system prompt for SQL generation."""
-        base_prompt = f"""You are an expert SQL query generator specializing in DuckDB syntax.
+# Model name patterns of providers that need an API key, checked in order. Models
+# can be prefixed with the provider (e.g. "openai/gpt-4o") or not (e.g. "gpt-4o");
+# local models (Ollama, etc.) match none and need no key.
+_PROVIDER_API_KEY_PATTERNS = (
+    (re.compile(r"openai/|gpt-|o1-|o3-", re.I), "OPENAI_API_KEY"),
+    (re.compile(r"anthropic/|claude-", re.I), "ANTHROPIC_API_KEY"),
+    (re.compile(r"gemini/|gemini-|vertex_ai/", re.I), "GEMINI_API_KEY"),
+)
 
-DATABASE SCHEMA:
-{schema_context}
+# Static system prompt instructions. They come first, ahead of the schema and SQL
+# that vary per call, so providers can cache them as a shared prompt prefix.
+_SYSTEM_PROMPT_INSTRUCTIONS = """You are an expert SQL query generator specializing in DuckDB syntax.
 
 INSTRUCTIONS:
 1. Generate a valid DuckDB SQL query based on the user's natural language request
@@ -221,10 +118,10 @@ INSTRUCTIONS:
 CRITICAL CONSTRAINTS:
 - You MUST ONLY generate SELECT statements for querying data
 - DO NOT generate DELETE, UPDATE, INSERT, CREATE, DROP, ALTER, TRUNCATE, or any other data modification or DDL statements
-- You MUST ONLY use tables and columns that are explicitly listed in the DATABASE SCHEMA above
+- You MUST ONLY use tables and columns that are explicitly listed in the DATABASE SCHEMA below
 - DO NOT assume, guess, or hallucinate table names or column names that are not provided
 - If the user requests something that requires tables or columns not in the DATABASE SCHEMA, you MUST inform them that you cannot generate the SQL because the required data is not available in the current schema context
-- If you are uncertain about whether a table or column exists, assume it does NOT exist unless explicitly shown above
+- If you are uncertain about whether a table or column exists, assume it does NOT exist unless explicitly shown below
 - If the user asks for data modification operations (DELETE, UPDATE, INSERT, etc.), inform them that you can only generate read-only SELECT queries
 
 RESPONSE FORMAT:
@@ -242,25 +139,10 @@ EXPLANATION:
 I cannot generate the SQL you requested because [explain what tables/columns are missing or why the operation is not supported]. Please add the necessary tables to your query first, or rephrase your request as a SELECT query.
 """
 
-        if additional_instructions:
-            base_prompt += f"\n\nADDITIONAL CONTEXT:\n{additional_instructions}"
-
-        return base_prompt
-
-    def _build_chat_system_prompt(self, schema_context: str, current_sql: str) -> str:
-        """Build system prompt for chat-based SQL editing."""
-        return f"""You are an expert SQL query editor specializing in DuckDB syntax.
+_CHAT_SYSTEM_PROMPT_INSTRUCTIONS = """You are an expert SQL query editor specializing in DuckDB syntax.
 
 You are helping a user iteratively build and refine a SQL query through conversation.
 
-DATABASE SCHEMA:
-{schema_context}
-
-CURRENT SQL QUERY:
-```sql
-{current_sql if current_sql.strip() else "(empty - no query yet)"}
-```
-
 INSTRUCTIONS:
 1. Listen to the user's instructions and modify the SQL query accordingly
 2. If the query is empty, create a new query based on the user's request
@@ -277,10 +159,10 @@ INSTRUCTIONS:
 CRITICAL CONSTRAINTS:
 - You MUST ONLY generate SELECT statements for querying data
 - DO NOT generate DELETE, UPDATE, INSERT, CREATE, DROP, ALTER, TRUNCATE, or any other data modification or DDL statements
-- You MUST ONLY use tables and columns that are explicitly listed in the DATABASE SCHEMA above
+- You MUST ONLY use tables and columns that are explicitly listed in the DATABASE SCHEMA below
 - DO NOT assume, guess, or hallucinate table names or column names that are not provided
 - If the user requests something that requires tables or columns not in the DATABASE SCHEMA, you MUST inform them that you cannot generate the SQL because the required data is not available in the current schema context
-- If you are uncertain about whether a table or column exists, assume it does NOT exist unless explicitly shown above
+- If you are uncertain about whether a table or column exists, assume it does NOT exist unless explicitly shown below
 - If the user asks for data modification operations (DELETE, UPDATE, INSERT, etc.), inform them that you can only generate read-only SELECT queries
 
 RESPONSE FORMAT:
@@ -298,46 +180,710 @@ EXPLANATION:
 I cannot generate the SQL you requested because [explain what tables/columns are missing or why the operation is not supported]. Please add the necessary tables to your query first, or rephrase your request as a SELECT query.
 """
 
+# Per-call parts of the system prompts, appended after the instructions
+_SCHEMA_CONTEXT_TEMPLATE = """
+DATABASE SCHEMA (columns are nullable unless marked NOT NULL):
+{schema_context}
+"""
+
+_CURRENT_SQL_TEMPLATE = """
+CURRENT SQL QUERY:
+```sql
+{current_sql}
+```
+"""
+
+
+@cache
+def _get_litellm() -> ModuleType:
+    """Import and configure LiteLLM on first use.
+
+    LiteLLM takes seconds to import, which dominated API cold start even though
+    most sessions never call the AI endpoints.
+    """
+    import httpx
+    import litellm
+
+    # Automatically drop unsupported parameters for different models
+    # This handles temperature, top_p, etc. for models that don't support them
+    litellm.drop_params = True
+
+    # Share one keep-alive pool across requests instead of a client per call,
+    # so repeated prompts reuse the provider's TCP/TLS connection. With the
+    # optional h2 package installed, concurrent prompts are multiplexed over
+    # one HTTP/2 connection instead of queuing for HTTP/1.1 connections.
+    litellm.aclient_session = httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE,
+            max_connections=AI_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=AI_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        # Generations can take minutes, but unreachable hosts should fail fast
+        timeout=httpx.Timeout(AI_HTTP_TIMEOUT, connect=AI_HTTP_CONNECT_TIMEOUT),
+    )
+    return litellm
+
+
+# aiohttp session passed to every LiteLLM call; created on first use
+_aiohttp_session: "aiohttp.ClientSession | None" = None
+
+
+def _get_aiohttp_session() -> "aiohttp.ClientSession":
+    """Return the aiohttp session shared by all LLM calls.
+
+    LiteLLM sends most provider requests through aiohttp and otherwise opens a
+    session (and a fresh TCP/TLS connection) per call. Must be called from the
+    event loop.
+    """
+    global _aiohttp_session
+    if _aiohttp_session is None or _aiohttp_session.closed:
+        import aiohttp
+
+        _aiohttp_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=AI_HTTP_MAX_CONNECTIONS,
+                keepalive_timeout=AI_HTTP_KEEPALIVE_EXPIRY,
+            )
+        )
+    return _aiohttp_session
+
+
+@lru_cache(maxsize=32)
+def _supports_prompt_caching(model: str) -> bool:
+    """Whether the model's provider accepts cache_control breakpoints via LiteLLM."""
+    _get_litellm()
+    from litellm.utils import supports_prompt_caching
+
+    try:
+        return supports_prompt_caching(model)
+    except Exception:
+        # Unknown models (e.g. local ones) aren't in LiteLLM's model map
+        return False
+
+
+@cache
+def _retryable_errors() -> tuple[type[Exception], ...]:
+    """LiteLLM exceptions for provider errors that are worth retrying."""
+    litellm = _get_litellm()
+    return (
+        litellm.RateLimitError,
+        litellm.APIConnectionError,
+        litellm.InternalServerError,
+        litellm.ServiceUnavailableError,
+        litellm.BadGatewayError,
+        litellm.Timeout,
+    )
+
+
+@lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def _count_tokens(model: str, text: str) -> int:
+    """Number of tokens in text for the model's tokenizer."""
+    try:
+        return _get_litellm().token_counter(model=model, text=text)
+    except Exception:
+        # Rough estimate when LiteLLM has no tokenizer for the model
+        return len(text) // 4
+
+
+def _compact_history_message(text: str) -> str:
+    """
+    Drop noise lines and consecutive duplicate lines from a chat message.
+
+    Kept lines are copied verbatim, so identifiers and error text are unchanged.
+    """
+    lines: list[str] = []
+    for line in text.split("\n"):
+        if _HISTORY_NOISE_LINE_RE.match(line) or (lines and lines[-1] == line):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _with_cache_breakpoints(messages: list[dict[str, str]]) -> list[dict[str, Any]]:
+    """
+    Split the system prompt into content blocks marked for provider-side caching.
+
+    The static instructions and the schema context each end a cached prefix, so
+    repeated calls (and chat turns over the same tables) reuse the provider's
+    cached prompt. The text sent is unchanged.
+    """
+    system_prompt = messages[0]["content"]
+    for instructions in (_SYSTEM_PROMPT_INSTRUCTIONS, _CHAT_SYSTEM_PROMPT_INSTRUCTIONS):
+        if system_prompt.startswith(instructions):
+            break
+    else:
+        return messages
+
+    # The schema block ends where the current SQL or additional context starts
+    rest = system_prompt[len(instructions) :]
+    schema_end = len(rest)
+    for header in ("\nCURRENT SQL QUERY:\n", "\n\nADDITIONAL CONTEXT:\n"):
+        index = rest.find(header)
+        if index != -1:
+            schema_end = min(schema_end, index)
+
+    blocks: list[dict[str, Any]] = [
+        {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": rest[:schema_end], "cache_control": {"type": "ephemeral"}},
+    ]
+    if rest[schema_end:]:
+        blocks.append({"type": "text", "text": rest[schema_end:]})
+    return [{"role": "system", "content": blocks}, *messages[1:]]
+
+
+async def close_ai_http_client() -> None:
+    """Close the shared LLM HTTP clients, if LiteLLM was ever loaded."""
+    global _aiohttp_session
+    if _aiohttp_session is not None:
+        await _aiohttp_session.close()
+        _aiohttp_session = None
+
+    if _get_litellm.cache_info().currsize == 0:
+        return
+
+    litellm = _get_litellm()
+    if litellm.aclient_session is not None:
+        await litellm.aclient_session.aclose()
+        litellm.aclient_session = None
+
+
+def _format_columns(columns: list[dict[str, Any]], mark_primary_key: bool = False) -> str:
+    """
+    Render column metadata as schema context lines, joined in one pass.
+
+    Only NOT NULL is spelled out; nullable is the default, and repeating "NULL"
+    on most columns of a wide schema costs tokens on every prompt.
+    """
+    if mark_primary_key:
+        lines = [
+            f"\n  - {col.get('name', '')}: {col.get('type', '')}"
+            f"{'' if col.get('nullable', True) else ' NOT NULL'}"
+            f"{' (PRIMARY KEY)' if col.get('is_primary_key', False) else ''}"
+            for col in columns
+        ]
+    else:
+        lines = [
+            f"\n  - {col.get('name', '')}: {col.get('type', '')}"
+            f"{'' if col.get('nullable', True) else ' NOT NULL'}"
+            for col in columns
+        ]
+    return "".join(lines)
+
+
+def _render_schema_context(query_metadata: list[dict[str, Any]]) -> str:
+    """Render query metadata as the schema context for system prompts."""
+    context_parts = []
+
+    for table_meta in query_metadata:
+        source_type = table_meta.get("source_type", "connection")
+        columns = table_meta.get("columns", [])
+        row_count = table_meta.get("row_count", "unknown")
+
+        if source_type == "file":
+            # Format file metadata
+            view_name = table_meta.get("view_name", "unknown")
+            file_name = table_meta.get("file_name", "unknown")
+            file_type = table_meta.get("file_type", "unknown")
+
+            table_lines = [
+                "",
+                f"File: {view_name}",
+                f"Original File: {file_name}.{file_type}",
+                f"Row Count: {row_count}",
+                "Columns:",
+            ]
+            context_parts.append("\n".join(table_lines) + _format_columns(columns))
+        elif source_type == "s3":
+            # Format S3 file metadata
+            view_name = table_meta.get("view_name", "unknown")
+            file_name = table_meta.get("file_name", "unknown")
+            file_path = table_meta.get("file_path", "unknown")
+            connection_name = table_meta.get("connection_name", "unknown")
+
+            table_lines = [
+                "",
+                f"S3 File: {view_name}",
+                f"Original File: {file_name}",
+                f"S3 Path: {file_path}",
+                f"S3 Connection: {connection_name}",
+                f"Row Count: {row_count}",
+                "Columns:",
+            ]
+            context_parts.append("\n".join(table_lines) + _format_columns(columns))
+        else:
+            # Format database table metadata
+            connection_id = table_meta.get("connection_id", "unknown")
+            connection_name = table_meta.get("connection_name", "unknown")
+            schema_name = table_meta.get("schema_name", "public")
+            table_name = table_meta.get("table_name", "unknown")
+
+            # Get the DuckDB identifier (generated from connection name)
+            identifier = table_meta.get("alias", connection_id.replace("-", "_"))
+
+            table_lines = [
+                "",
+                f"Table: {identifier}.{schema_name}.{table_name}",
+                f"Connection: {connection_name}",
+                f"Row Count: {row_count}",
+                "Columns:",
+            ]
+            context_parts.append(
+                "\n".join(table_lines) + _format_columns(columns, mark_primary_key=True)
+            )
+
+    return "\n".join(context_parts)
+
+
+# Rendered schema contexts keyed by a hash of their metadata, most recent last
+_schema_context_cache: OrderedDict[bytes, str] = OrderedDict()
+
+if get_settings().AI_PERSISTENT_CACHE_ENABLED:
+    _llm_cache = LLMCache(
+        SQLiteCacheBackend(settings_repository.db_path), ttl=LLM_PERSISTENT_CACHE_TTL_SECONDS
+    )
+else:
+    _llm_cache = LLMCache(InMemoryLRUCache(LLM_CACHE_SIZE), ttl=LLM_CACHE_TTL_SECONDS)
+_template_cache = (
+    TemplateCache(TEMPLATE_CACHE_SIZE) if get_settings().AI_TEMPLATE_CACHE_ENABLED else None
+)
+
+
+class AIService:
+    """Service for AI-powered SQL generation and editing."""
+
+    def __init__(
+        self,
+        model: str,
+        temperature: float = 0.1,
+        embedding_model: str | None = None,
+        semantic_cache: SemanticCache | None = None,
+    ):
+        """
+        Initialize AI service.
+
+        Args:
+            model: Model to use (e.g., "gpt-4o", "claude-3-5-sonnet-20241022", "ollama/llama2")
+            temperature: Temperature for generation (0.0-2.0, lower = more deterministic)
+            embedding_model: Embedding model for the semantic cache
+            semantic_cache: Reuse SQL from near-duplicate prompts (needs embedding_model)
+        """
+        self.model = model
+        self.temperature = temperature
+        self.embedding_model = embedding_model
+        self.semantic_cache = semantic_cache
+
+        # LiteLLM automatically reads API keys from environment variables
+        # No need to set them manually - they're already set by pydantic-settings
+
+    async def edit_sql_from_chat(
+        self,
+        current_sql: str,
+        user_message: str,
+        chat_history: list[Any],
+        query_metadata: list[dict[str, Any]],
+    ) -> dict[str, str]:
+        """
+        Edit SQL query based on chat conversation.
+
+        Args:
+            current_sql: Current state of the SQL query
+            user_message: Latest user message/instruction
+            chat_history: Previous chat messages
+            query_metadata: List of table metadata from query
+
+        Returns:
+            Dictionary with 'sql' and 'explanation' keys
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(_LOG_RULE)
+            logger.debug("Starting edit_sql_from_chat")
+            logger.debug("Model: %s, Temperature: %s", self.model, self.temperature)
+            logger.debug("User message: %s", user_message)
+            logger.debug("Current SQL length: %d chars", len(current_sql))
+            logger.debug("Chat history: %d messages", len(chat_history))
+            logger.debug("Query metadata: %d tables", len(query_metadata))
+
+        messages = self._build_chat_messages(
+            current_sql, user_message, chat_history, query_metadata
+        )
+
+        # Messages that differ only in numbers or dates ("top 10" vs "top 25") against
+        # the same schema, SQL and chat history can reuse a confirmed SQL template
+        template_key = None
+        if _template_cache is not None and self.temperature <= CACHEABLE_MAX_TEMPERATURE:
+            template, slots = extract_template(user_message)
+            if slots:
+                template_key = hashlib.sha256(
+                    to_json([self.model, messages[:-1], template])
+                ).hexdigest()
+                cached = _template_cache.lookup(template_key, slots)
+                if cached is not None:
+                    logger.debug("Chat edit served from template cache")
+                    return cached
+
+        result = await self._complete_sql_cached(messages)
+        if template_key is not None and result["sql"]:
+            _template_cache.record(template_key, slots, result)
+        return {"sql": result["sql"] or current_sql, "explanation": result["explanation"]}
+
+    async def stream_edit_sql(
+        self,
+        current_sql: str,
+        user_message: str,
+        chat_history: list[Any],
+        query_metadata: list[dict[str, Any]],
+    ) -> AsyncIterator[dict[str, str]]:
+        """
+        Stream a chat edit as the model produces it.
+
+        Like edit_sql_from_chat(), but callers can show the response before
+        the completion finishes. Streamed responses bypass the response caches.
+
+        Args:
+            current_sql: Current state of the SQL query
+            user_message: Latest user message/instruction
+            chat_history: Previous chat messages
+            query_metadata: List of table metadata from query
+
+        Yields:
+            {"delta": text} for each response fragment, then a final dictionary
+            with 'sql' and 'explanation' keys parsed from the full response
+        """
+        messages = self._build_chat_messages(
+            current_sql, user_message, chat_history, query_metadata
+        )
+
+        pieces = []
+        async for piece in self._stream_completion(messages):
+            if piece:
+                pieces.append(piece)
+                yield {"delta": piece}
+
+        sql, explanation = self._parse_response("".join(pieces))
+        yield {"sql": sql or current_sql, "explanation": explanation}
+
+    async def generate_sql_from_prompt(
+        self,
+        prompt: str,
+        query_metadata: list[dict[str, Any]],
+        additional_instructions: str | None = None,
+    ) -> dict[str, str]:
+        """
+        Generate SQL query from natural language prompt.
+
+        Args:
+            prompt: Natural language query from user
+            query_metadata: List of table metadata from query
+            additional_instructions: Optional additional context
+
+        Returns:
+            Dictionary with 'sql' and 'explanation' keys
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(_LOG_RULE)
+            logger.debug("Starting generate_sql_from_prompt")
+            logger.debug("Model: %s, Temperature: %s", self.model, self.temperature)
+            logger.debug("Prompt: %s", prompt)
+            logger.debug("Query metadata: %d tables", len(query_metadata))
+            logger.debug("Additional instructions: %s", additional_instructions)
+
+        messages = self._build_prompt_messages(prompt, query_metadata, additional_instructions)
+
+        if debug:
+            logger.debug(_LOG_SEPARATOR)
+            logger.debug("System prompt:")
+            logger.debug(messages[0]["content"])
+            logger.debug(_LOG_SEPARATOR)
+
+        if not self._use_semantic_cache():
+            return await self._complete_sql_cached(messages)
+
+        # The system prompt covers the schema context, so schema changes get a new scope
+        scope = hashlib.sha256(f"{self.model}\n{messages[0]['content']}".encode()).hexdigest()
+        vector = await self._embed(prompt)
+        if vector is not None:
+            cached = self.semantic_cache.lookup(scope, vector)
+            if cached is not None:
+                return cached
+
+        result = await self._complete_sql_cached(messages)
+        if vector is not None:
+            self.semantic_cache.add(scope, vector, result)
+        return result
+
+    def _use_semantic_cache(self) -> bool:
+        """Whether near-duplicate prompts may reuse an earlier response."""
+        return (
+            self.semantic_cache is not None
+            and self.embedding_model is not None
+            and self.temperature <= CACHEABLE_MAX_TEMPERATURE
+        )
+
+    async def _embed(self, text: str) -> list[float] | None:
+        """Embed text for the semantic cache; None if the embedding call fails."""
+        try:
+            response = await _get_litellm().aembedding(
+                model=self.embedding_model,
+                input=[text],
+                shared_session=_get_aiohttp_session(),
+            )
+        except Exception as e:
+            # The cache is an optimization; fall back to a normal generation
+            logger.warning("Embedding failed, skipping semantic cache: %s", e)
+            return None
+        return response.data[0]["embedding"]
+
+    async def _complete_sql_cached(self, messages: list[dict[str, str]]) -> dict[str, str]:
+        """Like _complete_sql(), but reuse the response to an identical earlier call."""
+        key = cache_key(self.model, messages, self.temperature)
+        if key is None:
+            return await self._complete_sql(messages)
+        return await _llm_cache.get_or_compute(key, lambda: self._complete_sql(messages))
+
+    async def _complete_sql(self, messages: list[dict[str, str]]) -> dict[str, str]:
+        """Call the LLM and parse SQL and explanation from its response."""
+        # Set before the try so the error path can always report the elapsed time
+        start_time = time.perf_counter()
+        try:
+            logger.debug("Calling LLM (%s)...", self.model)
+
+            content = "".join([piece async for piece in self._stream_completion(messages)])
+
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("LLM call completed in %.2f seconds", time.perf_counter() - start_time)
+                logger.debug(_LOG_SEPARATOR)
+                logger.debug("LLM Response:")
+                logger.debug(content)
+                logger.debug(_LOG_SEPARATOR)
+
+            sql, explanation = self._parse_response(content)
+
+            if debug:
+                logger.debug("Parsed SQL length: %d chars", len(sql))
+                logger.debug(
+                    "Explanation: %s%s", explanation[:100], "..." if len(explanation) > 100 else ""
+                )
+                logger.debug(_LOG_RULE)
+
+            return {"sql": sql, "explanation": explanation}
+
+        except Exception:
+            # Re-raise as-is so callers can tell provider errors (e.g. rate limits) apart
+            logger.exception("LLM call failed after %.2fs", time.perf_counter() - start_time)
+            logger.debug(_LOG_RULE)
+            raise
+
+    async def generate_sql_batch(
+        self,
+        items: list[tuple[str, list[dict[str, Any]]]],
+        additional_instructions: str | None = None,
+        max_concurrency: int = AI_MAX_CONCURRENT_REQUESTS,
+        return_exceptions: bool = True,
+    ) -> list[dict[str, str] | BaseException]:
+        """
+        Generate SQL for several prompts, each against its own tables, concurrently.
+
+        Args:
+            items: (prompt, query_metadata) pairs
+            additional_instructions: Optional additional context for every prompt
+            max_concurrency: Maximum LLM calls in flight at once
+            return_exceptions: Return a failed prompt's exception in its place
+                instead of failing the whole batch
+
+        Returns:
+            Per item, in order: a dictionary with 'sql' and 'explanation' keys,
+            or the exception raised for that prompt
+        """
+        # Bound in-flight calls to stay within provider rate limits
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate_one(prompt: str, query_metadata: list[dict[str, Any]]) -> dict[str, str]:
+            async with semaphore:
+                return await self.generate_sql_from_prompt(
+                    prompt, query_metadata, additional_instructions
+                )
+
+        return await asyncio.gather(
+            *(generate_one(prompt, query_metadata) for prompt, query_metadata in items),
+            return_exceptions=return_exceptions,
+        )
+
+    async def _stream_completion(self, messages: list[dict[str, str]]) -> AsyncIterator[str]:
+        """Run a streaming completion and yield the content deltas."""
+        if _supports_prompt_caching(self.model):
+            messages = _with_cache_breakpoints(messages)
+
+        # Retries only cover opening the stream; once content has been yielded
+        # a failure can't be retried transparently
+        attempt = 0
+        while True:
+            try:
+                # LiteLLM automatically handles provider differences
+                response = await _get_litellm().acompletion(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    stream=True,
+                    shared_session=_get_aiohttp_session(),
+                )
+                break
+            except _retryable_errors() as e:
+                if attempt >= AI_MAX_RETRIES:
+                    raise
+                delay = random.uniform(0, min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * 2**attempt))
+                attempt += 1
+                logger.warning(
+                    "LLM call failed (%s), retrying in %.2fs (%d/%d)",
+                    type(e).__name__,
+                    delay,
+                    attempt,
+                    AI_MAX_RETRIES,
+                )
+                await asyncio.sleep(delay)
+
+        async for chunk in response:
+            # Some providers send a final usage-only chunk without choices
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    def _build_chat_messages(
+        self,
+        current_sql: str,
+        user_message: str,
+        chat_history: list[Any],
+        query_metadata: list[dict[str, Any]],
+    ) -> list[dict[str, str]]:
+        """Build the system prompt, recent chat history and new message for a chat edit."""
+        schema_context = self._format_schema_context(query_metadata)
+        system_prompt = self._build_chat_system_prompt(schema_context, current_sql)
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(_LOG_SEPARATOR)
+            logger.debug("System prompt:")
+            logger.debug(system_prompt)
+            logger.debug(_LOG_SEPARATOR)
+
+        # Build conversation history
+        messages = [{"role": "system", "content": system_prompt}]
+
+        # Add previous chat messages, most recent first until the token budget is spent
+        window = chat_history[-CHAT_HISTORY_MAX_MESSAGES:]
+        history = []
+        budget = CHAT_HISTORY_TOKEN_BUDGET
+        omitted = 0
+        for i, msg in enumerate(reversed(window)):
+            role = getattr(msg, "role", None)
+            content = getattr(msg, "message", None)
+            if role is None or content is None:
+                continue
+            if role == "assistant":
+                content = _compact_history_message(content)
+            budget -= _count_tokens(self.model, content)
+            if budget < 0:
+                omitted = len(window) - i
+                break
+            history.append({"role": role, "content": content})
+
+        if omitted:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": f"Note: {omitted} earlier chat message(s) were omitted "
+                    "to keep the conversation within the context budget.",
+                }
+            )
+        messages.extend(reversed(history))
+        context_messages = len(history)
+
+        # Add current user message
+        messages.append({"role": "user", "content": user_message})
+
+        logger.debug(
+            "Total messages to LLM: %d (system + %d context + 1 new)",
+            len(messages),
+            context_messages,
+        )
+        return messages
+
+    def _build_prompt_messages(
+        self,
+        prompt: str,
+        query_metadata: list[dict[str, Any]],
+        additional_instructions: str | None = None,
+    ) -> list[dict[str, str]]:
+        """Build the system and user messages for SQL generation."""
+        schema_context = self._format_schema_context(query_metadata)
+        system_prompt = self._build_system_prompt(schema_context, additional_instructions)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    @lru_cache(maxsize=PROMPT_CACHE_SIZE)
+    def _build_system_prompt(
+        schema_context: str, additional_instructions: str | None = None
+    ) -> str:
+        """Build the system prompt for SQL generation (cached per schema context)."""
+        base_prompt = _SYSTEM_PROMPT_INSTRUCTIONS + _SCHEMA_CONTEXT_TEMPLATE.format(
+            schema_context=schema_context
+        )
+
+        if additional_instructions:
+            base_prompt += f"\n\nADDITIONAL CONTEXT:\n{additional_instructions}"
+
+        return base_prompt
+
+    @staticmethod
+    @lru_cache(maxsize=PROMPT_CACHE_SIZE)
+    def _build_chat_system_prompt(schema_context: str, current_sql: str) -> str:
+        """Build system prompt for chat-based SQL editing (cached per schema and SQL)."""
+        return (
+            _CHAT_SYSTEM_PROMPT_INSTRUCTIONS
+            + _SCHEMA_CONTEXT_TEMPLATE.format(schema_context=schema_context)
+            + _CURRENT_SQL_TEMPLATE.format(
+                current_sql=current_sql if current_sql.strip() else "(empty - no query yet)"
+            )
+        )
+
     def _parse_response(self, content: str) -> tuple[str, str]:
         """Parse SQL and explanation from LLM response."""
         sql = ""
         explanation = ""
 
-        # Try to extract SQL from markdown code blocks
-        if "```sql" in content:
-            sql_start = content.find("```sql") + 6
-            sql_end = content.find("```", sql_start)
-            if sql_end != -1:
-                sql = content[sql_start:sql_end].strip()
-
-        # Try to extract explanation
-        if "EXPLANATION:" in content:
-            exp_start = content.find("EXPLANATION:") + 12
-            explanation = content[exp_start:].strip()
-        elif "Explanation:" in content:
-            exp_start = content.find("Explanation:") + 12
-            explanation = content[exp_start:].strip()
+        # Try to extract SQL from markdown code blocks (the closing fence is required)
+        _, fence, rest = content.partition("```sql")
+        if fence:
+            block, fence, _ = rest.partition("```")
+            if fence:
+                sql = block.strip()
+
+        # Try to extract explanation ("EXPLANATION:" takes precedence over "Explanation:")
+        _, marker, tail = content.partition("EXPLANATION:")
+        if not marker:
+            _, marker, tail = content.partition("Explanation:")
+        if marker:
+            explanation = tail.strip()
 
         # Fallback: if no structured format, try to extract any SQL-like content
         # But only if there's no EXPLANATION block (which means it's a refusal/error response)
-        if not sql and "EXPLANATION:" not in content and "Explanation:" not in content:
-            # Look for SELECT statements at the beginning of lines (not in prose)
-            if "SELECT" in content.upper():
-                lines = content.split("\n")
-                sql_lines = []
-                in_sql = False
-                for line in lines:
-                    stripped = line.strip()
-                    # Only start SQL extraction if SELECT is at the beginning of the line
-                    if stripped.upper().startswith("SELECT") or (in_sql and stripped):
-                        in_sql = True
-                        sql_lines.append(line)
-                        if ";" in line:
-                            break
-                    elif in_sql:
-                        # Stop if we hit an empty line after starting SQL
-                        break
-                sql = "\n".join(sql_lines).strip()
+        if not sql and not marker:
+            # Look for SELECT statements at the beginning of lines (not in prose),
+            # up to the first line with a semicolon or the next empty line
+            match = _SELECT_BLOCK_RE.search(content)
+            if match:
+                block = match.group()
+                semicolon = block.find(";")
+                if semicolon != -1:
+                    line_end = block.find("\n", semicolon)
+                    if line_end != -1:
+                        block = block[:line_end]
+                sql = block.strip()
 
         # Final fallback: if no explanation was found but we have content,
         # treat the entire response as the explanation (e.g., answering questions about results)
@@ -347,118 +893,94 @@ I cannot generate the SQL you requested because [explain what tables/columns are
         return sql, explanation
 
     def _format_schema_context(self, query_metadata: list[dict[str, Any]]) -> str:
-        """Format query metadata into a schema context string."""
-        context_parts = []
-
-        for table_meta in query_metadata:
-            source_type = table_meta.get("source_type", "connection")
-            columns = table_meta.get("columns", [])
-            row_count = table_meta.get("row_count", "unknown")
-
-            if source_type == "file":
-                # Format file metadata
-                view_name = table_meta.get("view_name", "unknown")
-                file_name = table_meta.get("file_name", "unknown")
-                file_type = table_meta.get("file_type", "unknown")
-
-                table_info = f"\nFile: {view_name}"
-                table_info += f"\nOriginal File: {file_name}.{file_type}"
-                table_info += f"\nRow Count: {row_count}"
-                table_info += "\nColumns:"
-
-                for col in columns:
-                    col_name = col.get("name", "")
-                    col_type = col.get("type", "")
-                    nullable = "NULL" if col.get("nullable", True) else "NOT NULL"
-                    table_info += f"\n  - {col_name}: {col_type} {nullable}"
-
-                context_parts.append(table_info)
-            elif source_type == "s3":
-                # Format S3 file metadata
-                view_name = table_meta.get("view_name", "unknown")
-                file_name = table_meta.get("file_name", "unknown")
-                file_path = table_meta.get("file_path", "unknown")
-                connection_name = table_meta.get("connection_name", "unknown")
-
-                table_info = f"\nS3 File: {view_name}"
-                table_info += f"\nOriginal File: {file_name}"
-                table_info += f"\nS3 Path: {file_path}"
-                table_info += f"\nS3 Connection: {connection_name}"
-                table_info += f"\nRow Count: {row_count}"
-                table_info += "\nColumns:"
-
-                for col in columns:
-                    col_name = col.get("name", "")
-                    col_type = col.get("type", "")
-                    nullable = "NULL" if col.get("nullable", True) else "NOT NULL"
-                    table_info += f"\n  - {col_name}: {col_type} {nullable}"
-
-                context_parts.append(table_info)
-            else:
-                # Format database table metadata
-                connection_id = table_meta.get("connection_id", "unknown")
-                connection_name = table_meta.get("connection_name", "unknown")
-                schema_name = table_meta.get("schema_name", "public")
-                table_name = table_meta.get("table_name", "unknown")
-
-                # Get the DuckDB identifier (generated from connection name)
-                identifier = table_meta.get("alias", connection_id.replace("-", "_"))
-
-                table_info = f"\nTable: {identifier}.{schema_name}.{table_name}"
-                table_info += f"\nConnection: {connection_name}"
-                table_info += f"\nRow Count: {row_count}"
-                table_info += "\nColumns:"
-
-                for col in columns:
-                    col_name = col.get("name", "")
-                    col_type = col.get("type", "")
-                    nullable = "NULL" if col.get("nullable", True) else "NOT NULL"
-                    is_pk = " (PRIMARY KEY)" if col.get("is_primary_key", False) else ""
-                    table_info += f"\n  - {col_name}: {col_type} {nullable}{is_pk}"
-
-                context_parts.append(table_info)
-
-        return "\n".join(context_parts)
+        """Format query metadata into a schema context string (cached per metadata)."""
+        # Metadata rarely changes between chat turns; hash it instead of re-rendering.
+        # Sorted keys keep the hash independent of how the metadata dicts were built.
+        key = hashlib.blake2b(
+            json.dumps(query_metadata, sort_keys=True, default=str).encode(), digest_size=16
+        ).digest()
+        schema_context = _schema_context_cache.get(key)
+        if schema_context is None:
+            schema_context = _render_schema_context(query_metadata)
+            _schema_context_cache[key] = schema_context
+            if len(_schema_context_cache) > SCHEMA_CONTEXT_CACHE_SIZE:
+                _schema_context_cache.popitem(last=False)
+        else:
+            _schema_context_cache.move_to_end(key)
+        return schema_context
+
+
+# Config/env fallbacks for AI settings. Settings are loaded once per process
+# (get_settings is cached), so resolve the values once instead of per request
+_env_settings = get_settings()
+_ENV_OPENAI_API_KEY = _env_settings.OPENAI_API_KEY
+_ENV_ANTHROPIC_API_KEY = _env_settings.ANTHROPIC_API_KEY
+_ENV_GEMINI_API_KEY = _env_settings.GEMINI_API_KEY
+_ENV_AI_MODEL = _env_settings.AI_MODEL
+_ENV_AI_TEMPERATURE = _env_settings.AI_TEMPERATURE
+_ENV_AI_SEMANTIC_CACHE_ENABLED = _env_settings.AI_SEMANTIC_CACHE_ENABLED
+_ENV_AI_EMBEDDING_MODEL = _env_settings.AI_EMBEDDING_MODEL
+
+_semantic_cache = SemanticCache(
+    SEMANTIC_CACHE_SIZE,
+    threshold=_env_settings.AI_SEMANTIC_CACHE_THRESHOLD,
+    ttl=LLM_CACHE_TTL_SECONDS,
+)
 
 
 def get_ai_service() -> AIService:
-    """Get AI service instance with configured model."""
+    """Get AI service instance with configured model.
+
+    The service is resolved from settings once and reused until
+    invalidate_ai_settings_cache() is called.
+    """
+    return _resolve_ai_service()
+
+
+def close_llm_cache() -> None:
+    """Close the LLM response cache's database connection, if it has one."""
+    if isinstance(_llm_cache.backend, SQLiteCacheBackend):
+        _llm_cache.backend.close()
+
+
+def invalidate_ai_settings_cache() -> None:
+    """Drop the cached AI service; call after AI settings change."""
+    _resolve_ai_service.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def _resolve_ai_service() -> AIService:
+    """Build the AI service from settings (failures are not cached)."""
     # Get settings from database first, then fall back to config/env
     db_settings = settings_repository.get_ai_settings()
-    config_settings = get_settings()
 
     # Use database settings if available, otherwise fall back to config/env
-    openai_key = db_settings.get("openai_api_key") or config_settings.OPENAI_API_KEY
-    anthropic_key = db_settings.get("anthropic_api_key") or config_settings.ANTHROPIC_API_KEY
-    gemini_key = db_settings.get("gemini_api_key") or config_settings.GEMINI_API_KEY
-    model = db_settings.get("ai_model") or config_settings.AI_MODEL
+    api_keys = {
+        "OPENAI_API_KEY": db_settings.get("openai_api_key") or _ENV_OPENAI_API_KEY,
+        "ANTHROPIC_API_KEY": db_settings.get("anthropic_api_key") or _ENV_ANTHROPIC_API_KEY,
+        "GEMINI_API_KEY": db_settings.get("gemini_api_key") or _ENV_GEMINI_API_KEY,
+    }
+    model = db_settings.get("ai_model") or _ENV_AI_MODEL
     temperature_str = db_settings.get("ai_temperature")
-    temperature = float(temperature_str) if temperature_str else config_settings.AI_TEMPERATURE
+    temperature = float(temperature_str) if temperature_str else _ENV_AI_TEMPERATURE
 
     # Set API keys in environment for LiteLLM to use
-    if openai_key:
-        os.environ["OPENAI_API_KEY"] = openai_key
-    if anthropic_key:
-        os.environ["ANTHROPIC_API_KEY"] = anthropic_key
-    if gemini_key:
-        os.environ["GEMINI_API_KEY"] = gemini_key
+    for name, value in api_keys.items():
+        if value:
+            os.environ[name] = value
 
     # Validate that appropriate API key is set for the model
-    # Models can be prefixed with provider (e.g., "openai/gpt-4o") or not (e.g., "gpt-4o")
-    model_lower = model.lower()
-
-    # OpenAI models
-    if any(prefix in model_lower for prefix in ["openai/", "gpt-", "o1-", "o3-"]):
-        if not openai_key:
-            raise RuntimeError("OPENAI_API_KEY not configured. Please set it in Settings.")
-    # Anthropic models
-    elif any(prefix in model_lower for prefix in ["anthropic/", "claude-"]):
-        if not anthropic_key:
-            raise RuntimeError("ANTHROPIC_API_KEY not configured. Please set it in Settings.")
-    # Google models (Gemini or Vertex AI)
-    elif any(prefix in model_lower for prefix in ["gemini/", "gemini-", "vertex_ai/"]):
-        if not gemini_key:
-            raise RuntimeError("GEMINI_API_KEY not configured. Please set it in Settings.")
-    # Local models (Ollama, etc.) don't need API keys
-
-    return AIService(model=model, temperature=temperature)
+    for pattern, key_name in _PROVIDER_API_KEY_PATTERNS:
+        if pattern.search(model):
+            if not api_keys[key_name]:
+                raise RuntimeError(f"{key_name} not configured. Please set it in Settings.")
+            break
+
+    if not _ENV_AI_SEMANTIC_CACHE_ENABLED:
+        return AIService(model=model, temperature=temperature)
+    return AIService(
+        model=model,
+        temperature=temperature,
+        embedding_model=_ENV_AI_EMBEDDING_MODEL,
+        semantic_cache=_semantic_cache,
+    )
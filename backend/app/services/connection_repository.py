@@ -1,10 +1,22 @@
 import json
-import re
 import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Optional
 
-from app.models.schemas import ConnectionConfig, DataSourceType
+from app.models.schemas import ConnectionConfig
+from app.services.duckdb_manager import sanitize_identifier
+
+# Per-connection settings; WAL journal mode is persistent and set by the migration
+# service. With WAL, NORMAL sync is durable across application crashes and skips
+# an fsync per commit.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -64000",
+)
 
 
 class ConnectionRepository:
@@ -20,32 +32,70 @@ class ConnectionRepository:
         self.db_path = db_path
         # Note: Schema initialization is now handled by migrations
 
+        # One connection reused by every call, opened on first use; keeps SQLite's
+        # page cache warm instead of reopening the database (and its WAL) per call
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Use the shared connection in a transaction, committed on success."""
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                for pragma in _CONNECTION_PRAGMAS:
+                    conn.execute(pragma)
+                self._backfill_identifiers(conn)
+                self._conn = conn
+            with self._conn:
+                yield self._conn
+
+    def _backfill_identifiers(self, conn: sqlite3.Connection) -> None:
+        """Fill in the identifier column for rows saved before it existed."""
+        rows = conn.execute("SELECT id, name FROM connections WHERE identifier IS NULL").fetchall()
+        if rows:
+            with conn:
+                conn.executemany(
+                    "UPDATE connections SET identifier = ? WHERE id = ?",
+                    [(self._sanitize_identifier(row["name"]), row["id"]) for row in rows],
+                )
+
+    def close(self) -> None:
+        """Close the shared connection; the next call reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def save(self, connection_id: str, config: ConnectionConfig) -> None:
         """Save or update a connection configuration."""
         # Check if this is an update (connection already exists)
         existing = self.get(connection_id)
 
         # Check for identifier collision (sanitized name conflict)
+        identifier = self._sanitize_identifier(config.name)
         conflicting_name = self.check_identifier_collision(config.name, connection_id)
         if conflicting_name:
-            sanitized_id = self._sanitize_identifier(config.name)
             raise ValueError(
-                f"Connection identifier '{sanitized_id}' conflicts with existing connection '{conflicting_name}'. "
+                f"Connection identifier '{identifier}' conflicts with existing connection '{conflicting_name}'. "
                 f"Please choose a different name."
             )
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             if existing:
                 # Update existing connection
                 conn.execute(
                     """
                     UPDATE connections
-                    SET name = ?, type = ?, config = ?, updated_at = CURRENT_TIMESTAMP
+                    SET name = ?, identifier = ?, type = ?, config = ?,
+                        updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                     """,
                     (
                         config.name,
-                        config.type.value,
+                        identifier,
+                        config.type,
                         json.dumps(config.config),
                         connection_id,
                     ),
@@ -54,22 +104,21 @@ class ConnectionRepository:
                 # Insert new connection (no alias needed)
                 conn.execute(
                     """
-                    INSERT INTO connections (id, name, type, config, updated_at)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    INSERT INTO connections (id, name, identifier, type, config, updated_at)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                     """,
                     (
                         connection_id,
                         config.name,
-                        config.type.value,
+                        identifier,
+                        config.type,
                         json.dumps(config.config),
                     ),
                 )
-            conn.commit()
 
     def get(self, connection_id: str) -> Optional[ConnectionConfig]:
         """Get a connection configuration by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.execute(
                 "SELECT name, type, config FROM connections WHERE id = ?",
                 (connection_id,),
@@ -79,58 +128,36 @@ class ConnectionRepository:
             if row:
                 return ConnectionConfig(
                     name=row["name"],
-                    type=DataSourceType(row["type"]),
+                    type=row["type"],
                     config=json.loads(row["config"]),
                 )
             return None
 
     def get_all(self) -> list[dict[str, Any]]:
         """Get all saved connections (without sensitive data)."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
+        with self._connection() as conn:
+            cursor = conn.execute("""
                 SELECT id, name, type, created_at, updated_at
                 FROM connections
                 ORDER BY updated_at DESC
-                """
-            )
+                """)
             return [dict(row) for row in cursor.fetchall()]
 
     def delete(self, connection_id: str) -> bool:
         """Delete a connection configuration."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.execute("DELETE FROM connections WHERE id = ?", (connection_id,))
-            conn.commit()
             return cursor.rowcount > 0
 
     def exists(self, connection_id: str) -> bool:
         """Check if a connection exists."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.execute("SELECT 1 FROM connections WHERE id = ?", (connection_id,))
             return cursor.fetchone() is not None
 
     def _sanitize_identifier(self, name: str) -> str:
-        """Sanitize connection name to a valid DuckDB identifier.
-
-        This must match the logic in DuckDBManager._generate_duckdb_identifier()
-        to ensure collision detection works correctly.
-        """
-        # Convert to lowercase and replace spaces/special chars with underscores
-        sanitized = re.sub(r"[^a-z0-9]+", "_", name.lower())
-
-        # Remove leading/trailing underscores
-        sanitized = sanitized.strip("_")
-
-        # Ensure it doesn't start with a digit
-        if sanitized and sanitized[0].isdigit():
-            sanitized = f"db_{sanitized}"
-
-        # Truncate to reasonable length (50 chars)
-        if len(sanitized) > 50:
-            sanitized = sanitized[:50].rstrip("_")
-
-        return sanitized
+        """Sanitize connection name to the DuckDB identifier it will be attached as."""
+        return sanitize_identifier(name)
 
     def check_identifier_collision(
         self, connection_name: str, exclude_id: Optional[str] = None
@@ -146,23 +173,21 @@ class ConnectionRepository:
         """
         proposed_identifier = self._sanitize_identifier(connection_name)
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            # Get all connections except the one being updated
+        with self._connection() as conn:
+            # Indexed lookup, excluding the connection being updated
             if exclude_id:
                 cursor = conn.execute(
-                    "SELECT name FROM connections WHERE id != ?",
-                    (exclude_id,),
+                    "SELECT name FROM connections WHERE identifier = ? AND id != ? LIMIT 1",
+                    (proposed_identifier, exclude_id),
                 )
             else:
-                cursor = conn.execute("SELECT name FROM connections")
-
-            for row in cursor.fetchall():
-                existing_identifier = self._sanitize_identifier(row["name"])
-                if existing_identifier == proposed_identifier:
-                    return row["name"]
+                cursor = conn.execute(
+                    "SELECT name FROM connections WHERE identifier = ? LIMIT 1",
+                    (proposed_identifier,),
+                )
+            row = cursor.fetchone()
 
-        return None
+        return row["name"] if row else None
 
 
 # Global repository instance
@@ -115,6 +115,64 @@ class ConnectionManager:
         except Exception as e:
             return False, f"Error reconnecting: {str(e)}"
 
+    async def reconnect_all(self) -> dict[str, tuple[bool, str]]:
+        """
+        Reconnect every saved connection that is not currently active.
+
+        Connections are grouped by type so each connection class can set them up
+        in one batch (e.g. all S3 secrets in a single DuckDB transaction).
+
+        Returns:
+            dict: connection_id -> (success, message)
+        """
+        results: dict[str, tuple[bool, str]] = {}
+        pending: dict[type[BaseConnection], list[tuple[BaseConnection, ConnectionConfig]]] = {}
+
+        for saved in connection_repository.get_all():
+            connection_id = saved["id"]
+            if connection_id in self.connections:
+                continue
+
+            config = connection_repository.get(connection_id)
+            if not config:
+                continue
+
+            connection_class = ConnectionRegistry.get(config.type)
+            if not connection_class:
+                results[connection_id] = (False, f"Unsupported data source type: {config.type}")
+                continue
+
+            try:
+                datasource = connection_class(
+                    connection_id=connection_id, connection_name=config.name, config=config.config
+                )
+            except Exception as e:
+                results[connection_id] = (False, f"Error reconnecting: {str(e)}")
+                continue
+            pending.setdefault(connection_class, []).append((datasource, config))
+
+        for connection_class, items in pending.items():
+            datasources = [datasource for datasource, _ in items]
+            try:
+                successes = await connection_class.connect_all(datasources)
+            except Exception as e:
+                for datasource in datasources:
+                    results[datasource.connection_id] = (False, f"Error reconnecting: {str(e)}")
+                continue
+
+            for (datasource, config), success in zip(items, successes):
+                if success:
+                    self.connections[datasource.connection_id] = datasource
+                    results[datasource.connection_id] = (
+                        True,
+                        f"Successfully reconnected to {config.name}",
+                    )
+                else:
+                    error_msg = datasource.connection_error or "Failed to establish connection"
+                    results[datasource.connection_id] = (False, error_msg)
+
+        return results
+
     async def get_connection(self, connection_id: str) -> Optional[BaseConnection]:
         """Get an active connection by ID. Attempts to reconnect if not active."""
         datasource = self.connections.get(connection_id)
@@ -194,7 +252,7 @@ class ConnectionManager:
         return {
             "id": connection_id,
             "name": config.name,
-            "type": config.type.value,
+            "type": config.type,
             "config": safe_config,
         }
 
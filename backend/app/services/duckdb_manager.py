@@ -1,7 +1,12 @@
 """Persistent DuckDB instance manager for QBox."""
 
 import logging
+import queue
 import re
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import repeat
 from pathlib import Path
 from typing import Any, Optional
 
@@ -11,6 +16,68 @@ from app.models.schemas import DataSourceType, PostgresConnectionConfig, S3Conne
 
 logger = logging.getLogger(__name__)
 
+# Idle cursors kept for reuse; extra cursors are closed when released
+CURSOR_POOL_SIZE = 8
+
+# Runs of characters not allowed in a DuckDB identifier (matched after lowercasing)
+_IDENTIFIER_INVALID_CHARS_RE = re.compile(r"[^a-z0-9]+")
+
+# Invisible Unicode characters (zero-width space, etc.) that break endpoint URLs
+_INVISIBLE_CHARS_RE = re.compile(r"[\u200B-\u200D\uFEFF\u2060]")
+
+
+def sanitize_identifier(name: str) -> str:
+    """Create a valid SQL identifier from a connection name.
+
+    Used both to attach connections and to detect identifier collisions when
+    they are saved, so the two always agree.
+
+    Args:
+        name: The connection name
+
+    Returns:
+        A valid SQL identifier like 'production_db' or 'data_bucket'
+    """
+    # Convert to lowercase and replace spaces/special chars with underscores
+    sanitized = _IDENTIFIER_INVALID_CHARS_RE.sub("_", name.lower())
+
+    # Remove leading/trailing underscores
+    sanitized = sanitized.strip("_")
+
+    # Ensure it doesn't start with a digit
+    if sanitized and sanitized[0].isdigit():
+        sanitized = f"db_{sanitized}"
+
+    # Truncate to reasonable length (50 chars)
+    if len(sanitized) > 50:
+        sanitized = sanitized[:50].rstrip("_")
+
+    return sanitized
+
+
+def sql_literal(value: str) -> str:
+    """Quote a value as a SQL string literal, escaping embedded quotes."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def clean_endpoint_url(endpoint_url: str) -> str:
+    """Strip whitespace and invisible characters pasted along with an endpoint URL."""
+    return _INVISIBLE_CHARS_RE.sub("", endpoint_url.strip())
+
+
+def rows_to_dicts(columns: list[str], rows: list[tuple]) -> list[dict[str, Any]]:
+    """Convert DuckDB result tuples into column-keyed dictionaries.
+
+    Args:
+        columns: Column names from the result description
+        rows: Rows as returned by fetchall()
+
+    Returns:
+        List of dictionaries mapping column name to value
+    """
+    # map() keeps the zip/dict construction loop in C instead of a Python comprehension
+    return list(map(dict, map(zip, repeat(tuple(columns)), rows)))
+
 
 class DuckDBManager:
     """Manages a persistent DuckDB instance for cross-source querying."""
@@ -29,29 +96,71 @@ class DuckDBManager:
         self._attached_connections: dict[str, str] = {}
         # Cache of registered files: {file_id: view_name}
         self._registered_files: dict[str, str] = {}
+        # Idle cursors on self.conn for use from worker threads
+        self._cursor_pool: queue.Queue[duckdb.DuckDBPyConnection] = queue.Queue(
+            maxsize=CURSOR_POOL_SIZE
+        )
+        # Serializes opening and closing self.conn; queries run on worker threads
+        self._connect_lock = threading.Lock()
         logger.info(f"DuckDB database path: {self.db_path}")
 
     def connect(self) -> duckdb.DuckDBPyConnection:
-        """Get or create persistent DuckDB connection."""
-        if self.conn is None:
-            self.conn = duckdb.connect(str(self.db_path))
-            self._install_extensions()
-            self._sync_cache_with_duckdb()
-            logger.info("Connected to persistent DuckDB instance")
-        return self.conn
-
-    def _sync_cache_with_duckdb(self) -> None:
+        """Get or create persistent DuckDB connection.
+
+        Safe to call from worker threads: the connection is opened once and only
+        published after its extensions are loaded.
+        """
+        conn = self.conn
+        if conn is None:
+            with self._connect_lock:
+                conn = self.conn
+                if conn is None:
+                    conn = duckdb.connect(str(self.db_path))
+                    self._install_extensions(conn)
+                    self._sync_cache_with_duckdb(conn)
+                    self.conn = conn
+                    logger.info("Connected to persistent DuckDB instance")
+        return conn
+
+    @contextmanager
+    def acquire_cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Check out a cursor on the persistent connection for the current thread.
+
+        A DuckDB connection object must not be shared across threads, but its
+        cursors can run queries in parallel against the same database, seeing
+        the same attachments, secrets and views. Cursors are pooled so
+        concurrent queries don't pay for creating one each time.
+
+        Yields:
+            A cursor that is returned to the pool when the block exits
+        """
+        conn = self.connect()
+        try:
+            cursor = self._cursor_pool.get_nowait()
+        except queue.Empty:
+            cursor = conn.cursor()
+
+        try:
+            yield cursor
+        finally:
+            if self.conn is not conn:
+                # The connection was closed or replaced while the cursor was out
+                cursor.close()
+            else:
+                try:
+                    self._cursor_pool.put_nowait(cursor)
+                except queue.Full:
+                    cursor.close()
+
+    def _sync_cache_with_duckdb(self, conn: duckdb.DuckDBPyConnection) -> None:
         """Sync the attachment cache with actual DuckDB state.
 
         This is called on connection to populate the cache with any
         connections that were already attached in the persistent database.
         """
-        if not self.conn:
-            return
-
         try:
             # Get all currently attached databases
-            result = self.conn.execute("SELECT database_name FROM duckdb_databases()")
+            result = conn.execute("SELECT database_name FROM duckdb_databases()")
             databases = result.fetchall()
 
             # Filter for postgres connections (skip system databases)
@@ -68,18 +177,15 @@ class DuckDBManager:
         except Exception as e:
             logger.warning(f"Could not sync cache with DuckDB state: {e}")
 
-    def _install_extensions(self) -> None:
+    def _install_extensions(self, conn: duckdb.DuckDBPyConnection) -> None:
         """Install and load necessary DuckDB extensions."""
-        if not self.conn:
-            return
-
         # Extensions: postgres for PostgreSQL, httpfs for S3, spatial for Excel
         extensions = ["postgres", "httpfs", "spatial"]
 
         for ext in extensions:
             try:
-                self.conn.execute(f"INSTALL {ext}")
-                self.conn.execute(f"LOAD {ext}")
+                conn.execute(f"INSTALL {ext}")
+                conn.execute(f"LOAD {ext}")
                 logger.info(f"Loaded DuckDB extension: {ext}")
             except Exception as e:
                 logger.warning(f"Could not load extension {ext}: {e}")
@@ -93,21 +199,7 @@ class DuckDBManager:
         Returns:
             A valid SQL identifier like 'production_db' or 'data_bucket'
         """
-        # Convert to lowercase and replace spaces/special chars with underscores
-        sanitized = re.sub(r"[^a-z0-9]+", "_", name.lower())
-
-        # Remove leading/trailing underscores
-        sanitized = sanitized.strip("_")
-
-        # Ensure it doesn't start with a digit
-        if sanitized and sanitized[0].isdigit():
-            sanitized = f"db_{sanitized}"
-
-        # Truncate to reasonable length (50 chars)
-        if len(sanitized) > 50:
-            sanitized = sanitized[:50].rstrip("_")
-
-        return sanitized
+        return sanitize_identifier(name)
 
     def is_attached(self, connection_id: str) -> bool:
         """Check if a connection is already attached.
@@ -238,7 +330,70 @@ class DuckDBManager:
             )
             return cached_identifier
 
-        conn = self.connect()
+        # Use a pooled cursor so the secret can be configured from a worker thread
+        with self.acquire_cursor() as conn:
+            return self._configure_s3_secret(conn, connection_id, connection_name, config)
+
+    def configure_s3_secrets_bulk(
+        self, configs: list[tuple[str, str, S3ConnectionConfig]]
+    ) -> dict[str, str]:
+        """Configure several S3 secrets in a single DuckDB transaction.
+
+        Connections that are already configured are skipped. All remaining
+        schemas and secrets are created by one multi-statement script, so either
+        every secret is created or none are.
+
+        Args:
+            configs: (connection_id, connection_name, config) tuples
+
+        Returns:
+            Mapping of connection_id to the schema/secret identifier
+        """
+        identifiers: dict[str, str] = {}
+        pending: dict[str, str] = {}
+        statements: list[str] = []
+
+        for connection_id, connection_name, config in configs:
+            cached_identifier = self._attached_connections.get(connection_id)
+            if cached_identifier:
+                identifiers[connection_id] = cached_identifier
+                continue
+
+            identifier = self._generate_duckdb_identifier(connection_name)
+            statements.append(f"CREATE SCHEMA IF NOT EXISTS {identifier}")
+            statements.append(self._build_s3_secret_query(identifier, config))
+            pending[connection_id] = identifier
+
+        if not pending:
+            return identifiers
+
+        script = "BEGIN TRANSACTION;\n" + ";\n".join(statements) + ";\nCOMMIT;"
+        with self.acquire_cursor() as conn:
+            try:
+                conn.execute(script)
+            except Exception as e:
+                logger.error(f"Failed to create S3 secrets in bulk: {e}")
+                # Leave the pooled cursor outside of the aborted transaction
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception:
+                    pass  # No transaction was left open
+                raise
+
+        # Cache the identifiers only once the transaction has committed
+        self._attached_connections.update(pending)
+        identifiers.update(pending)
+        logger.info(f"Created {len(pending)} S3 secrets and schemas in one transaction (cached)")
+        return identifiers
+
+    def _configure_s3_secret(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        connection_id: str,
+        connection_name: str,
+        config: S3ConnectionConfig,
+    ) -> str:
+        """Create the S3 secret and view schema on the given connection."""
         # Generate identifier from connection name (used for both secret and schema)
         identifier = self._generate_duckdb_identifier(connection_name)
 
@@ -258,76 +413,7 @@ class DuckDBManager:
 
         # Create S3 secret based on credential type
         try:
-            if config.credential_type == "manual":
-                # Build secret parameters
-                secret_params = [
-                    "TYPE S3",
-                    f"KEY_ID '{config.aws_access_key_id}'",
-                    f"SECRET '{config.aws_secret_access_key}'",
-                    f"REGION '{config.region or 'us-east-1'}'",
-                ]
-
-                # Add session token if provided
-                if config.aws_session_token:
-                    secret_params.append(f"SESSION_TOKEN '{config.aws_session_token}'")
-
-                # Add endpoint URL if provided (for LocalStack or S3-compatible services)
-                if config.endpoint_url:
-                    import re
-
-                    # Strip whitespace and remove all invisible/non-printable characters
-                    endpoint_url = config.endpoint_url.strip()
-                    # Remove invisible Unicode characters (zero-width space, etc.)
-                    endpoint_url = re.sub(r"[\u200B-\u200D\uFEFF\u2060]", "", endpoint_url)
-                    # Remove protocol (DuckDB adds it based on USE_SSL)
-                    endpoint = endpoint_url.replace("https://", "").replace("http://", "")
-                    secret_params.append(f"ENDPOINT '{endpoint}'")
-                    secret_params.append(
-                        "URL_STYLE 'path'"
-                    )  # Use path-style URLs for custom endpoints
-                    secret_params.append("URL_COMPATIBILITY_MODE true")  # Enable S3-compatible mode
-                    # Disable SSL for HTTP endpoints
-                    if endpoint_url.startswith("http://"):
-                        secret_params.append("USE_SSL false")
-
-                create_secret_query = f"""
-                    CREATE OR REPLACE SECRET {identifier} (
-                        {', '.join(secret_params)}
-                    )
-                """
-                logger.debug(f"Creating S3 secret with manual credentials: {identifier}")
-            else:
-                # Use default credential provider chain
-                secret_params = [
-                    "TYPE S3",
-                    "PROVIDER CREDENTIAL_CHAIN",
-                    f"REGION '{config.region or 'us-east-1'}'",
-                ]
-
-                # Add endpoint URL if provided
-                if config.endpoint_url:
-                    import re
-
-                    # Strip whitespace and remove all invisible/non-printable characters
-                    endpoint_url = config.endpoint_url.strip()
-                    # Remove invisible Unicode characters (zero-width space, etc.)
-                    endpoint_url = re.sub(r"[\u200B-\u200D\uFEFF\u2060]", "", endpoint_url)
-                    # Remove protocol (DuckDB adds it based on USE_SSL)
-                    endpoint = endpoint_url.replace("https://", "").replace("http://", "")
-                    secret_params.append(f"ENDPOINT '{endpoint}'")
-                    secret_params.append("URL_STYLE 'path'")
-                    secret_params.append("URL_COMPATIBILITY_MODE true")  # Enable S3-compatible mode
-                    # Disable SSL for HTTP endpoints
-                    if endpoint_url.startswith("http://"):
-                        secret_params.append("USE_SSL false")
-
-                create_secret_query = f"""
-                    CREATE OR REPLACE SECRET {identifier} (
-                        {', '.join(secret_params)}
-                    )
-                """
-                logger.debug(f"Creating S3 secret with credential chain: {identifier}")
-
+            create_secret_query = self._build_s3_secret_query(identifier, config)
             conn.execute(create_secret_query)
             # Cache the identifier
             self._attached_connections[connection_id] = identifier
@@ -337,6 +423,70 @@ class DuckDBManager:
             logger.error(f"Failed to create S3 secret: {e}")
             raise
 
+    def _build_s3_secret_query(self, identifier: str, config: S3ConnectionConfig) -> str:
+        """Build the CREATE SECRET statement for an S3 configuration."""
+        if config.credential_type == "manual":
+            # Build secret parameters
+            secret_params = [
+                "TYPE S3",
+                f"KEY_ID {sql_literal(config.aws_access_key_id)}",
+                f"SECRET {sql_literal(config.aws_secret_access_key)}",
+                f"REGION {sql_literal(config.region or 'us-east-1')}",
+            ]
+
+            # Add session token if provided
+            if config.aws_session_token:
+                secret_params.append(f"SESSION_TOKEN {sql_literal(config.aws_session_token)}")
+
+            # Add endpoint URL if provided (for LocalStack or S3-compatible services)
+            if config.endpoint_url:
+                # Strip whitespace and invisible Unicode characters (zero-width space, etc.)
+                endpoint_url = clean_endpoint_url(config.endpoint_url)
+                # Remove protocol (DuckDB adds it based on USE_SSL)
+                endpoint = endpoint_url.replace("https://", "").replace("http://", "")
+                secret_params.append(f"ENDPOINT {sql_literal(endpoint)}")
+                secret_params.append("URL_STYLE 'path'")  # Use path-style URLs for custom endpoints
+                secret_params.append("URL_COMPATIBILITY_MODE true")  # Enable S3-compatible mode
+                # Disable SSL for HTTP endpoints
+                if endpoint_url.startswith("http://"):
+                    secret_params.append("USE_SSL false")
+
+            create_secret_query = f"""
+                CREATE OR REPLACE SECRET {identifier} (
+                    {', '.join(secret_params)}
+                )
+            """
+            logger.debug(f"Creating S3 secret with manual credentials: {identifier}")
+        else:
+            # Use default credential provider chain
+            secret_params = [
+                "TYPE S3",
+                "PROVIDER CREDENTIAL_CHAIN",
+                f"REGION {sql_literal(config.region or 'us-east-1')}",
+            ]
+
+            # Add endpoint URL if provided
+            if config.endpoint_url:
+                # Strip whitespace and invisible Unicode characters (zero-width space, etc.)
+                endpoint_url = clean_endpoint_url(config.endpoint_url)
+                # Remove protocol (DuckDB adds it based on USE_SSL)
+                endpoint = endpoint_url.replace("https://", "").replace("http://", "")
+                secret_params.append(f"ENDPOINT {sql_literal(endpoint)}")
+                secret_params.append("URL_STYLE 'path'")
+                secret_params.append("URL_COMPATIBILITY_MODE true")  # Enable S3-compatible mode
+                # Disable SSL for HTTP endpoints
+                if endpoint_url.startswith("http://"):
+                    secret_params.append("USE_SSL false")
+
+            create_secret_query = f"""
+                CREATE OR REPLACE SECRET {identifier} (
+                    {', '.join(secret_params)}
+                )
+            """
+            logger.debug(f"Creating S3 secret with credential chain: {identifier}")
+
+        return create_secret_query
+
     def detach_by_connection_id(self, connection_id: str, connection_type: DataSourceType) -> None:
         """Detach/cleanup a connection by its connection_id.
 
@@ -380,7 +530,8 @@ class DuckDBManager:
             return
 
         try:
-            self.conn.execute(f"DROP SECRET IF EXISTS {secret_name}")
+            with self.acquire_cursor() as cursor:
+                cursor.execute(f"DROP SECRET IF EXISTS {secret_name}")
             # Remove from cache
             connection_id_to_remove = None
             for conn_id, cached_secret in self._attached_connections.items():
@@ -399,17 +550,57 @@ class DuckDBManager:
         Returns:
             Tuple of (column_names, rows)
         """
-        conn = self.connect()
-
         try:
-            result = conn.execute(query)
-            columns = [desc[0] for desc in result.description]
-            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+            # A pooled cursor keeps this safe to run from worker threads
+            with self.acquire_cursor() as cursor:
+                result = cursor.execute(query)
+                columns = [desc[0] for desc in result.description]
+                rows = rows_to_dicts(columns, result.fetchall())
             return columns, rows
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
             raise
 
+    def execute_query_columnar(self, query: str) -> tuple[list[str], list[list[Any]]]:
+        """Execute a SQL query and return its values column by column.
+
+        One list per column instead of one dict per row, so large results
+        allocate far fewer Python objects and serialize more compactly.
+
+        Returns:
+            Tuple of (column_names, column_values) where column_values[i]
+            holds every value of columns[i] in row order
+        """
+        try:
+            with self.acquire_cursor() as cursor:
+                result = cursor.execute(query)
+                columns = [desc[0] for desc in result.description]
+                rows = result.fetchall()
+            # zip(*rows) transposes in C; an empty result still has one list per column
+            data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+            return columns, data
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+
+    def execute_query_cursor(self, query: str) -> duckdb.DuckDBPyConnection:
+        """Execute a SQL query on a dedicated cursor and leave the result unfetched.
+
+        Lets callers stream large results with fetchmany() instead of
+        materializing every row. The caller must close the returned cursor.
+
+        Returns:
+            Cursor holding the pending result
+        """
+        cursor = self.connect().cursor()
+        try:
+            cursor.execute(query)
+        except Exception as e:
+            cursor.close()
+            logger.error(f"Query execution failed: {e}")
+            raise
+        return cursor
+
     def get_attached_sources(self) -> list[dict[str, str]]:
         """Get list of currently attached data sources."""
         conn = self.connect()
@@ -444,9 +635,7 @@ class DuckDBManager:
 
         # Create human-readable view name from file name
         # Sanitize the name: lowercase, replace spaces/special chars with underscores
-        import re
-
-        sanitized_name = re.sub(r"[^a-z0-9]+", "_", file_name.lower())
+        sanitized_name = _IDENTIFIER_INVALID_CHARS_RE.sub("_", file_name.lower())
         sanitized_name = sanitized_name.strip("_")
 
         # Ensure it doesn't start with a digit
@@ -502,9 +691,7 @@ class DuckDBManager:
             The view name that was created
         """
         # Generate the view name using the same logic as register_file
-        import re
-
-        sanitized_name = re.sub(r"[^a-z0-9]+", "_", file_name.lower())
+        sanitized_name = _IDENTIFIER_INVALID_CHARS_RE.sub("_", file_name.lower())
         sanitized_name = sanitized_name.strip("_")
 
         if sanitized_name and sanitized_name[0].isdigit():
@@ -599,7 +786,7 @@ class DuckDBManager:
             columns_data = result.fetchall()
 
             columns = [
-                ColumnMetadata(
+                ColumnMetadata.from_trusted(
                     name=col[0],
                     type=col[1],
                     nullable=col[2] == "YES" if len(col) > 2 else True,
@@ -624,13 +811,20 @@ class DuckDBManager:
 
     def close(self) -> None:
         """Close the DuckDB connection and clear caches."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            # Clear caches since connection is closed
-            self._attached_connections.clear()
-            self._registered_files.clear()
-            logger.info("Closed DuckDB connection and cleared caches")
+        with self._connect_lock:
+            if self.conn:
+                # Drop pooled cursors before closing the connection they belong to
+                while True:
+                    try:
+                        self._cursor_pool.get_nowait().close()
+                    except queue.Empty:
+                        break
+                self.conn.close()
+                self.conn = None
+                # Clear caches since connection is closed
+                self._attached_connections.clear()
+                self._registered_files.clear()
+                logger.info("Closed DuckDB connection and cleared caches")
 
 
 # Global DuckDB manager instance
@@ -0,0 +1,410 @@
+"""Caches for parsed LLM responses (exact-match, semantic and template)."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import operator
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Responses are only cached for near-deterministic sampling; at higher
+# temperatures users expect a different answer when they ask again
+CACHEABLE_MAX_TEMPERATURE = 0.2
+
+
+def cache_key(model: str, messages: list[dict[str, str]], temperature: float) -> str | None:
+    """
+    Build the cache key for an LLM call.
+
+    Returns:
+        SHA-256 hex digest of the canonical JSON of (model, messages, temperature),
+        or None if responses at this temperature should not be cached
+    """
+    if temperature > CACHEABLE_MAX_TEMPERATURE:
+        return None
+
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CacheBackend(Protocol):
+    """Storage for cached responses (e.g. in-process LRU, Redis)."""
+
+    async def get(self, key: str) -> dict[str, str] | None:
+        """Return the stored value, or None if missing or expired."""
+        ...
+
+    async def set(self, key: str, value: dict[str, str], ttl: float) -> None:
+        """Store a value for ttl seconds."""
+        ...
+
+
+class InMemoryLRUCache:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, dict[str, str]]] = OrderedDict()
+
+    async def get(self, key: str) -> dict[str, str] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict[str, str], ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    Cache backend in the app's SQLite database, so entries survive restarts.
+
+    Storage errors are logged and treated as misses; the cache never fails an
+    LLM call. Database calls run on a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        # One connection reused by every call, opened on first use
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Use the shared connection in a transaction, committed on success."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            with self._conn:
+                yield self._conn
+
+    def close(self) -> None:
+        """Close the shared connection; the next call reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def get(self, key: str) -> dict[str, str] | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: dict[str, str], ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    def _get(self, key: str) -> dict[str, str] | None:
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT sql, explanation FROM llm_response_cache "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return None
+        return {"sql": row[0], "explanation": row[1]} if row else None
+
+    def _set(self, key: str, value: dict[str, str], ttl: float) -> None:
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    """
+                    INSERT INTO llm_response_cache (key, sql, explanation, expires_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        sql = excluded.sql,
+                        explanation = excluded.explanation,
+                        expires_at = excluded.expires_at
+                    """,
+                    (key, value["sql"], value["explanation"], now + ttl),
+                )
+        except sqlite3.Error as e:
+            logger.warning("LLM cache write failed: %s", e)
+
+
+class LLMCache:
+    """
+    Response cache in front of LLM calls.
+
+    Concurrent misses for the same key share one in-flight call instead of
+    each hitting the provider.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._pending: dict[str, asyncio.Future[dict[str, str]]] = {}
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[dict[str, str]]]
+    ) -> dict[str, str]:
+        """Return the cached value for key, computing and storing it on a miss."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            # shield() so a cancelled waiter doesn't cancel the shared call
+            return dict(await asyncio.shield(pending))
+
+        # Registered before awaiting the backend so concurrent misses find it
+        future: asyncio.Future[dict[str, str]] = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await self.backend.get(key)
+            if value is not None:
+                self.hits += 1
+                logger.debug("LLM cache hit (%d hits, %d misses)", self.hits, self.misses)
+            else:
+                self.misses += 1
+                value = await compute()
+                await self.backend.set(key, value, self.ttl)
+        except BaseException as e:
+            del self._pending[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Waiters re-raise it; don't log it as never retrieved
+                future.exception()
+            raise
+
+        del self._pending[key]
+        future.set_result(value)
+        return dict(value)
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters for observability."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SemanticCache:
+    """
+    Cache of responses looked up by embedding similarity.
+
+    Entries are scoped (e.g. by model and schema context), so a prompt only
+    matches earlier prompts against the same tables. Lookups scan the scope's
+    entries; the cache is small enough that this stays well under the cost of
+    a single LLM call. Entries expire ttl seconds after they are added.
+    """
+
+    def __init__(self, maxsize: int, threshold: float, ttl: float):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # (scope, expires at, normalized vector, value), oldest first
+        self._entries: deque[tuple[str, float, tuple[float, ...], dict[str, str]]] = deque(
+            maxlen=maxsize
+        )
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> tuple[float, ...]:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return tuple(x / norm for x in vector)
+
+    def lookup(self, scope: str, vector: list[float]) -> dict[str, str] | None:
+        """Return the most similar cached value in scope, if above the threshold."""
+        now = time.monotonic()
+        # Entries are added in order with the same ttl, so expired ones are at the front
+        while self._entries and self._entries[0][1] <= now:
+            self._entries.popleft()
+
+        query = self._normalize(vector)
+        best_score = self.threshold
+        best: dict[str, str] | None = None
+        for entry_scope, _, entry_vector, value in self._entries:
+            if entry_scope != scope or len(entry_vector) != len(query):
+                continue
+            score = sum(map(operator.mul, entry_vector, query))
+            if score >= best_score:
+                best_score, best = score, value
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.debug("Semantic cache hit (similarity %.3f)", best_score)
+        return dict(best)
+
+    def add(self, scope: str, vector: list[float], value: dict[str, str]) -> None:
+        """Store a value; the oldest entry is dropped once maxsize is reached."""
+        self._entries.append(
+            (scope, time.monotonic() + self.ttl, self._normalize(vector), dict(value))
+        )
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+# Literals in a chat message: quoted strings, ISO dates and numbers
+_MESSAGE_LITERAL_RE = re.compile(
+    r"'([^']*)'|\"([^\"]*)\"|(?<![\w.])(\d{4}-\d{2}-\d{2}|\d+(?:\.\d+)?)(?![\w.])"
+)
+
+# Literal values that can be pasted into SQL as-is, quoted or not: ISO dates and numbers
+_SAFE_SLOT_RE = re.compile(r"\d{4}-\d{2}-\d{2}|\d+(?:\.\d+)?")
+
+
+def extract_template(message: str) -> tuple[str, tuple[str, ...]]:
+    """
+    Split a chat message into its structure and its literal values.
+
+    "orders after '2024-01-01' over 100" and "orders after '2024-06-01' over 250"
+    share the template "orders after '?' over ?" with slots ("2024-01-01", "100")
+    and ("2024-06-01", "250").
+
+    Only numbers and ISO dates become slots, since they are substituted into
+    SQL without escaping. Other quoted strings stay part of the template.
+
+    Returns:
+        Tuple of (template, slots); slots is empty if the message has no
+        usable literals
+    """
+    slots: list[str] = []
+
+    def mask(match: re.Match[str]) -> str:
+        single, double, bare = match.groups()
+        if not _SAFE_SLOT_RE.fullmatch(match.group(match.lastindex)):
+            return match.group()
+        if single is not None:
+            slots.append(single)
+            return "'?'"
+        if double is not None:
+            slots.append(double)
+            return '"?"'
+        slots.append(bare)
+        return "?"
+
+    template = _MESSAGE_LITERAL_RE.sub(mask, message)
+    # Repeated values can't be told apart in the response
+    if len(set(slots)) != len(slots):
+        return message, ()
+    return template, tuple(slots)
+
+
+# A template is a sequence of text segments and slot indexes
+_Template = tuple[str | int, ...]
+
+
+def _split_on_slots(text: str, slots: tuple[str, ...], exactly_once: bool) -> _Template | None:
+    """Replace slot values in text with their indexes, or None if that is ambiguous."""
+    slot_indexes = {value: i for i, value in enumerate(slots)}
+    pattern = re.compile(
+        "|".join(
+            rf"(?<!\w){re.escape(value)}(?!\w)" for value in sorted(slots, key=len, reverse=True)
+        )
+    )
+
+    parts: list[str | int] = []
+    seen: list[int] = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(text[position : match.start()])
+        parts.append(slot_indexes[match.group()])
+        seen.append(slot_indexes[match.group()])
+        position = match.end()
+    parts.append(text[position:])
+
+    if exactly_once and sorted(seen) != list(range(len(slots))):
+        return None
+    return tuple(parts)
+
+
+def _render(template: _Template, slots: tuple[str, ...]) -> str:
+    return "".join(slots[part] if isinstance(part, int) else part for part in template)
+
+
+class TemplateCache:
+    """
+    Responses for chat messages that differ only in literal values.
+
+    After an LLM call, the literals from the message are located in the
+    generated SQL to derive a SQL template. A template is only served once a
+    second call with different literal values produced the same template;
+    hits then substitute the new values without calling the LLM.
+    """
+
+    def __init__(self, maxsize: int, min_confirmations: int = 2):
+        self.maxsize = maxsize
+        self.min_confirmations = min_confirmations
+        self.hits = 0
+        # key -> (sql template, explanation template, slots first seen, confirmations)
+        self._entries: OrderedDict[str, tuple[_Template, _Template, tuple[str, ...], int]] = (
+            OrderedDict()
+        )
+
+    def lookup(self, key: str, slots: tuple[str, ...]) -> dict[str, str] | None:
+        """Render the trusted template for key with new slot values, if any."""
+        entry = self._entries.get(key)
+        if entry is None or entry[3] < self.min_confirmations or len(entry[2]) != len(slots):
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        sql_template, explanation_template, _, _ = entry
+        return {
+            "sql": _render(sql_template, slots),
+            "explanation": _render(explanation_template, slots),
+        }
+
+    def record(self, key: str, slots: tuple[str, ...], value: dict[str, str]) -> None:
+        """Derive a template from an LLM response and count confirmations."""
+        sql_template = _split_on_slots(value["sql"], slots, exactly_once=True)
+        if sql_template is None:
+            # The response doesn't carry the literals over verbatim; not templatable
+            self._entries.pop(key, None)
+            return
+        explanation_template = _split_on_slots(value["explanation"], slots, exactly_once=False)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == sql_template:
+            # Only different values prove the template generalizes
+            confirmations = entry[3] + 1 if entry[2] != slots else entry[3]
+            self._entries[key] = (sql_template, explanation_template, entry[2], confirmations)
+        else:
+            self._entries[key] = (sql_template, explanation_template, slots, 1)
+
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
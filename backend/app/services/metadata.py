@@ -6,7 +6,7 @@ from typing import Any, Optional
 from app.models.schemas import (
     ColumnMetadata,
     ConnectionMetadataLite,
-    DataSourceType,
+    DataSourceLiteral,
     TableMetadata,
 )
 from app.services.duckdb_manager import get_duckdb_manager
@@ -24,7 +24,7 @@ class MetadataService:
         self,
         connection_id: str,
         connection_name: str,
-        source_type: DataSourceType,
+        source_type: DataSourceLiteral,
         config: dict[str, Any],
         schema_name: str,
         table_name: str,
@@ -62,7 +62,7 @@ class MetadataService:
         return TableMetadata(
             name=table_dict["name"],
             schema_name=table_dict["schema_name"],
-            columns=[ColumnMetadata(**col) for col in table_dict["columns"]],
+            columns=[ColumnMetadata.from_trusted(**col) for col in table_dict["columns"]],
             row_count=table_dict.get("row_count"),
         )
 
@@ -70,8 +70,9 @@ class MetadataService:
         self,
         connection_id: str,
         connection_name: str,
-        source_type: DataSourceType,
+        source_type: DataSourceLiteral,
         config: dict[str, Any],
+        force_refresh: bool = False,
     ) -> ConnectionMetadataLite:
         """Refresh lightweight metadata for a connection.
 
@@ -80,6 +81,7 @@ class MetadataService:
             connection_name: Connection name
             source_type: Type of data source
             config: Connection configuration
+            force_refresh: Drop any cached metadata before collecting
 
         Returns:
             Updated lightweight metadata (table names only)
@@ -95,6 +97,8 @@ class MetadataService:
         connection = connection_class(
             connection_id=connection_id, connection_name=connection_name, config=config
         )
+        if force_refresh:
+            connection.invalidate_cache()
 
         # Delegate to connection-specific metadata collection
         return await connection.collect_metadata()
@@ -278,9 +282,9 @@ async def get_query_metadata(query_id: str) -> list[dict[str, Any]]:
             # Ensure S3 secret is configured in DuckDB (handles app restart case
             # where the in-memory cache is empty but the secret exists in DuckDB)
             if not duckdb_manager.get_attached_identifier(connection_id):
-                from app.models.schemas import S3ConnectionConfig
+                from app.models.schemas import S3_CONNECTION_CONFIG_ADAPTER
 
-                s3_config = S3ConnectionConfig(**connection_config.config)
+                s3_config = S3_CONNECTION_CONFIG_ADAPTER.validate_python(connection_config.config)
                 duckdb_manager.configure_s3_secret(
                     connection_id,
                     connection_name,
@@ -136,7 +136,7 @@ class PostgresMetadataCollector:
                 table_name = row["table_name"]
                 # Create lightweight table metadata (name only)
                 tables.append(
-                    TableMetadataLite(
+                    TableMetadataLite.from_trusted(
                         name=table_name,
                         schema_name=schema_name,
                     )
@@ -231,7 +231,7 @@ class PostgresMetadataCollector:
             columns = []
             for row in rows:
                 columns.append(
-                    ColumnMetadata(
+                    ColumnMetadata.from_trusted(
                         name=row["column_name"],
                         type=row["data_type"],
                         nullable=row["is_nullable"] == "YES",
@@ -2,6 +2,8 @@
 
 import logging
 import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 
@@ -34,11 +36,21 @@ class MigrationService:
         # Ensure data directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    def _get_backend(self) -> DatabaseBackend:
-        """Get a Yoyo backend for the SQLite database."""
+    @contextmanager
+    def _backend(self) -> Iterator[DatabaseBackend]:
+        """Open a Yoyo backend for the SQLite database, closing its connection after use.
+
+        Yoyo's backend sits in a reference cycle, so its connection would otherwise
+        stay open until the garbage collector runs. A lingering handle keeps the
+        database files in use, e.g. after they are deleted and recreated.
+        """
         # Use SQLite URI format for yoyo
         db_uri = f"sqlite:///{self.db_path}"
-        return get_backend(db_uri)
+        backend = get_backend(db_uri)
+        try:
+            yield backend
+        finally:
+            backend.connection.close()
 
     def _get_migrations(self) -> MigrationList:
         """Read all available migrations."""
@@ -103,6 +115,15 @@ class MigrationService:
                     )
                     conn.commit()
 
+    def _enable_wal(self) -> None:
+        """Switch the database to WAL journal mode (persists across connections).
+
+        Readers no longer block on writers, and commits append to the WAL instead
+        of rewriting pages through a rollback journal.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+
     def run_migrations(self) -> int:
         """Run all pending migrations.
 
@@ -112,10 +133,10 @@ class MigrationService:
         Returns:
             Number of migrations applied
         """
-        backend = self._get_backend()
+        self._enable_wal()
         migrations = self._get_migrations()
 
-        with backend.lock():
+        with self._backend() as backend, backend.lock():
             # Handle pre-existing databases
             if self._check_existing_tables():
                 applied_migrations = backend.to_rollback(migrations)
@@ -151,10 +172,9 @@ class MigrationService:
         Returns:
             Number of migrations rolled back
         """
-        backend = self._get_backend()
         migrations = self._get_migrations()
 
-        with backend.lock():
+        with self._backend() as backend, backend.lock():
             to_rollback = backend.to_rollback(migrations)[:count]
 
             if not to_rollback:
@@ -177,11 +197,11 @@ class MigrationService:
         Returns:
             Dictionary with applied and pending migration info
         """
-        backend = self._get_backend()
         migrations = self._get_migrations()
 
-        applied = backend.to_rollback(migrations)
-        to_apply = backend.to_apply(migrations)
+        with self._backend() as backend:
+            applied = backend.to_rollback(migrations)
+            to_apply = backend.to_apply(migrations)
 
         return {
             "applied": [m.id for m in applied],
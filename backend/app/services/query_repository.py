@@ -6,7 +6,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
-from app.models.schemas import ChatMessage, Query, QueryTableSelection
+from app.models.schemas import (
+    QUERY_LIST_ADAPTER,
+    QUERY_TABLE_SELECTION_LIST_ADAPTER,
+    ChatMessage,
+    Query,
+    QueryTableSelection,
+)
 
 
 class QueryRepository:
@@ -81,25 +87,15 @@ class QueryRepository:
         """Get all queries, ordered by most recently updated."""
         with self._get_connection() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT id, name, sql_text, created_at, updated_at
+            cursor = conn.execute("""
+                SELECT id, name, COALESCE(sql_text, '') AS sql_text, created_at, updated_at
                 FROM queries
                 ORDER BY updated_at DESC
-                """
-            )
+                """)
             rows = cursor.fetchall()
 
-            return [
-                Query(
-                    id=row["id"],
-                    name=row["name"],
-                    sql_text=row["sql_text"] or "",
-                    created_at=row["created_at"],
-                    updated_at=row["updated_at"],
-                )
-                for row in rows
-            ]
+            # Validate the whole list in one pydantic-core call
+            return QUERY_LIST_ADAPTER.validate_python([dict(row) for row in rows])
 
     def update_query_sql(self, query_id: str, sql_text: str, save_to_history: bool = True) -> bool:
         """Update the SQL text of a query and optionally save to history."""
@@ -230,16 +226,7 @@ class QueryRepository:
             )
             rows = cursor.fetchall()
 
-            return [
-                QueryTableSelection(
-                    query_id=row["query_id"],
-                    connection_id=row["connection_id"],
-                    schema_name=row["schema_name"],
-                    table_name=row["table_name"],
-                    source_type=row["source_type"],
-                )
-                for row in rows
-            ]
+            return QUERY_TABLE_SELECTION_LIST_ADAPTER.validate_python([dict(row) for row in rows])
 
     def clear_query_selections(self, query_id: str) -> None:
         """Remove all table selections from a query."""
@@ -327,7 +314,7 @@ class QueryRepository:
             rows = cursor.fetchall()
 
             return [
-                ChatMessage(
+                ChatMessage.from_trusted(
                     id=row["id"],
                     query_id=row["query_id"],
                     role=row["role"],
@@ -200,9 +200,9 @@ class S3Service:
             # Ensure S3 secret is configured in DuckDB
             secret_name = self.duckdb_manager.get_attached_identifier(connection_id)
             if not secret_name:
-                from app.models.schemas import S3ConnectionConfig
+                from app.models.schemas import S3_CONNECTION_CONFIG_ADAPTER
 
-                s3_config = S3ConnectionConfig(**connection_config.config)
+                s3_config = S3_CONNECTION_CONFIG_ADAPTER.validate_python(connection_config.config)
                 secret_name = self.duckdb_manager.configure_s3_secret(
                     connection_id,
                     connection_config.name,
@@ -234,7 +234,7 @@ class S3Service:
                 columns = []
                 for row in rows:
                     columns.append(
-                        ColumnMetadata(
+                        ColumnMetadata.from_trusted(
                             name=row.get("column_name", ""),
                             type=row.get("column_type", ""),
                             nullable=row.get("null", "YES") == "YES",
@@ -127,6 +127,11 @@ def test_query_repository(test_db_path: Path, monkeypatch):
 
     monkeypatch.setattr(db_mod, "query_repository", repo)
 
+    # And in the query API, so requests use the test database
+    from app.api import query as query_api_mod
+
+    monkeypatch.setattr(query_api_mod, "query_repository", repo)
+
     return repo
 
 
@@ -179,13 +184,23 @@ def mock_ai_service(monkeypatch):
             "explanation": "Generated test SQL query",
         }
 
+    async def mock_stream_edit_sql(*args, **kwargs):
+        yield {"delta": "SELECT * FROM test_table LIMIT 10"}
+        yield await mock_edit_sql()
+
     mock_service.edit_sql_from_chat = mock_edit_sql
+    mock_service.stream_edit_sql = mock_stream_edit_sql
 
     # Patch the getter
     from app.services import ai_service as ai_mod
 
     monkeypatch.setattr(ai_mod, "get_ai_service", lambda *args, **kwargs: mock_service)
 
+    # Also patch the reference in the query API which imports it at module level
+    from app.api import query as query_api_mod
+
+    monkeypatch.setattr(query_api_mod, "get_ai_service", lambda *args, **kwargs: mock_service)
+
     return mock_service
 
 
@@ -296,6 +296,62 @@ class TestDuckDBManager:
 
         assert not fresh_duckdb_manager.is_attached("test-conn")
 
+    def test_concurrent_connect_opens_once(self, fresh_duckdb_manager, monkeypatch):
+        """Should open a single connection when worker threads connect at the same time."""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        from app.services import duckdb_manager as duckdb_mod
+
+        real_connect = duckdb_mod.duckdb.connect
+        opened = []
+
+        def slow_connect(*args, **kwargs):
+            opened.append(args)
+            # Widen the window in which other threads could also see no connection
+            time.sleep(0.05)
+            return real_connect(*args, **kwargs)
+
+        monkeypatch.setattr(duckdb_mod.duckdb, "connect", slow_connect)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            connections = list(executor.map(lambda _: fresh_duckdb_manager.connect(), range(8)))
+
+        assert len(opened) == 1
+        assert all(conn is fresh_duckdb_manager.conn for conn in connections)
+
+    def test_sql_literal_round_trip(self, fresh_duckdb_manager):
+        """Should quote values so DuckDB reads them back unchanged."""
+        from app.services.duckdb_manager import sql_literal
+
+        value = "it's a 'key'); DROP TABLE t; --"
+        _, rows = fresh_duckdb_manager.execute_query(f"SELECT {sql_literal(value)} AS v")
+
+        assert rows == [{"v": value}]
+
+    def test_s3_secret_escapes_values(self, fresh_duckdb_manager):
+        """Should escape quotes in S3 credentials instead of ending the literal early."""
+        from app.models.schemas import S3_CONNECTION_CONFIG_ADAPTER
+
+        config = S3_CONNECTION_CONFIG_ADAPTER.validate_python(
+            {
+                "credential_type": "manual",
+                "aws_access_key_id": "key'id",
+                "aws_secret_access_key": "secret'); DROP SCHEMA main; --",
+                "aws_session_token": "to'ken",
+                "bucket": "test-bucket",
+                "region": "us-east-1",
+                "endpoint_url": "http://local'host:4566",
+            }
+        )
+
+        query = fresh_duckdb_manager._build_s3_secret_query("test_s3", config)
+
+        assert "KEY_ID 'key''id'" in query
+        assert "SECRET 'secret''); DROP SCHEMA main; --'" in query
+        assert "SESSION_TOKEN 'to''ken'" in query
+        assert "ENDPOINT 'local''host:4566'" in query
+
 
 class TestPostgresConnection:
     """Tests with a real PostgreSQL database using testcontainers."""
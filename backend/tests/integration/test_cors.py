@@ -0,0 +1,59 @@
+"""Integration tests for CORS handling.
+
+These tests verify the CORS middleware behavior including:
+- Preflight responses for allowed and disallowed origins
+- CORS headers on simple cross-origin requests
+"""
+
+from httpx import AsyncClient
+
+ALLOWED_ORIGIN = "http://localhost:5173"
+
+
+class TestCORS:
+    """Tests for cross-origin request handling."""
+
+    async def test_preflight_allowed_origin(self, test_client: AsyncClient):
+        """Should answer preflight requests from allowed origins."""
+        response = await test_client.options(
+            "/api/queries/",
+            headers={
+                "Origin": ALLOWED_ORIGIN,
+                "Access-Control-Request-Method": "POST",
+                "Access-Control-Request-Headers": "content-type",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert response.headers["access-control-allow-headers"] == "content-type"
+        assert "POST" in response.headers["access-control-allow-methods"]
+
+    async def test_preflight_disallowed_origin(self, test_client: AsyncClient):
+        """Should reject preflight requests from unknown origins."""
+        response = await test_client.options(
+            "/api/queries/",
+            headers={
+                "Origin": "http://evil.example",
+                "Access-Control-Request-Method": "POST",
+            },
+        )
+
+        assert response.status_code == 400
+        assert "access-control-allow-origin" not in response.headers
+
+    async def test_simple_request_allowed_origin(self, test_client: AsyncClient):
+        """Should add CORS headers to responses for allowed origins."""
+        response = await test_client.get("/health", headers={"Origin": ALLOWED_ORIGIN})
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+        assert response.headers["vary"] == "Origin"
+
+    async def test_simple_request_without_origin(self, test_client: AsyncClient):
+        """Should leave same-origin responses untouched."""
+        response = await test_client.get("/health")
+
+        assert response.status_code == 200
+        assert "access-control-allow-origin" not in response.headers
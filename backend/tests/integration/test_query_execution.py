@@ -5,9 +5,12 @@ These tests verify the query workflow including:
 - Managing table selections
 - Executing queries against CSV files
 - Query pagination
+- Streaming AI chat edits
 - SQL history
 """
 
+import json
+
 import pytest
 from httpx import AsyncClient
 
@@ -75,6 +78,19 @@ class TestQueryCRUD:
         assert response.status_code == 200
         assert response.json()["sql_text"] == "SELECT 2"
 
+    async def test_update_query_sql_invalid_body(self, test_client: AsyncClient):
+        """Should reject an invalid body with a FastAPI-style 422 error."""
+        create_response = await test_client.post(
+            "/api/queries/",
+            json={"name": "SQL Invalid Body Test", "sql_text": "SELECT 1"},
+        )
+        query_id = create_response.json()["id"]
+
+        response = await test_client.patch(f"/api/queries/{query_id}/sql", json={})
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "sql_text"]
+
     async def test_update_query_name(self, test_client: AsyncClient):
         """Should update query name."""
         # Create query
@@ -282,6 +298,22 @@ class TestDuckDBQueryExecution:
         assert rows[0]["num"] == 1
         assert rows[0]["msg"] == "hello"
 
+    def test_execute_query_columnar(self, fresh_duckdb_manager):
+        """Should return one value list per column."""
+        columns, data = fresh_duckdb_manager.execute_query_columnar(
+            "SELECT * FROM (VALUES (1, 'a'), (2, 'b')) AS t(num, msg)"
+        )
+
+        assert columns == ["num", "msg"]
+        assert data == [[1, 2], ["a", "b"]]
+
+        # Empty results still have a list per column
+        columns, data = fresh_duckdb_manager.execute_query_columnar(
+            "SELECT 1 AS num, 'x' AS msg WHERE false"
+        )
+        assert columns == ["num", "msg"]
+        assert data == [[], []]
+
     def test_execute_query_with_error(self, fresh_duckdb_manager):
         """Should raise exception for invalid SQL."""
         with pytest.raises(Exception):
@@ -399,6 +431,119 @@ class TestChatHistory:
         assert len(history) == 0
 
 
+class TestChatStream:
+    """Tests for streaming AI chat edits over server-sent events."""
+
+    @pytest.fixture
+    def chat_query(self, test_client: AsyncClient, test_query_repository, monkeypatch) -> str:
+        """Create a query whose table metadata is stubbed out."""
+        from app.api import query as query_api_mod
+
+        async def fake_query_metadata(query_id):
+            return [{"source_type": "file", "view_name": "test_table", "columns": []}]
+
+        monkeypatch.setattr(query_api_mod, "get_query_metadata", fake_query_metadata)
+        return test_query_repository.create_query("Chat Test", "SELECT 1").id
+
+    @staticmethod
+    def parse_events(body: str) -> list[tuple[str, dict]]:
+        """Split an event stream into (event, data) pairs."""
+        events = []
+        for block in body.strip().split("\n\n"):
+            event_line, data_line = block.split("\n")
+            events.append(
+                (event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: ")))
+            )
+        return events
+
+    async def test_stream_deltas_then_done(
+        self, test_client: AsyncClient, test_query_repository, chat_query: str
+    ):
+        """Should stream deltas, then save the result and send it in a done event."""
+        response = await test_client.post(
+            f"/api/queries/{chat_query}/chat/stream", json={"message": "show test rows"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self.parse_events(response.text)
+        assert [event for event, _ in events] == ["delta", "done"]
+        assert events[0][1] == {"delta": "SELECT * FROM test_table LIMIT 10"}
+        assert events[1][1]["updated_sql"] == "SELECT * FROM test_table LIMIT 10"
+        assert events[1][1]["message"]["message"] == "Generated test SQL query"
+
+        assert test_query_repository.get_query(chat_query).sql_text == (
+            "SELECT * FROM test_table LIMIT 10"
+        )
+        history = test_query_repository.get_chat_history(chat_query)
+        assert [msg.role for msg in history] == ["user", "assistant"]
+
+    async def test_stream_ai_error(
+        self, test_client: AsyncClient, test_query_repository, mock_ai_service, chat_query: str
+    ):
+        """Should send an error event and save nothing if generation fails."""
+
+        async def failing_stream(*args, **kwargs):
+            yield {"delta": "SELECT"}
+            raise RuntimeError("provider unavailable")
+
+        mock_ai_service.stream_edit_sql = failing_stream
+
+        response = await test_client.post(
+            f"/api/queries/{chat_query}/chat/stream", json={"message": "show test rows"}
+        )
+
+        events = self.parse_events(response.text)
+        assert [event for event, _ in events] == ["delta", "error"]
+        assert "provider unavailable" in events[1][1]["detail"]
+        assert test_query_repository.get_query(chat_query).sql_text == "SELECT 1"
+        assert test_query_repository.get_chat_history(chat_query) == []
+
+    async def test_stream_without_result(
+        self, test_client: AsyncClient, test_query_repository, mock_ai_service, chat_query: str
+    ):
+        """Should send an error event if the stream ends without a final result."""
+
+        async def truncated_stream(*args, **kwargs):
+            yield {"delta": "SELECT"}
+
+        mock_ai_service.stream_edit_sql = truncated_stream
+
+        response = await test_client.post(
+            f"/api/queries/{chat_query}/chat/stream", json={"message": "show test rows"}
+        )
+
+        events = self.parse_events(response.text)
+        assert [event for event, _ in events] == ["delta", "error"]
+        assert test_query_repository.get_chat_history(chat_query) == []
+
+    async def test_stream_save_error(
+        self, test_client: AsyncClient, test_query_repository, chat_query: str, monkeypatch
+    ):
+        """Should send an error event if saving the result fails."""
+
+        def failing_update(*args, **kwargs):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(test_query_repository, "update_query_sql", failing_update)
+
+        response = await test_client.post(
+            f"/api/queries/{chat_query}/chat/stream", json={"message": "show test rows"}
+        )
+
+        events = self.parse_events(response.text)
+        assert [event for event, _ in events] == ["delta", "error"]
+        assert "database is locked" in events[1][1]["detail"]
+
+    async def test_stream_unknown_query(self, test_client: AsyncClient):
+        """Should return 404 before streaming for nonexistent queries."""
+        response = await test_client.post(
+            "/api/queries/nonexistent-id/chat/stream", json={"message": "hi"}
+        )
+
+        assert response.status_code == 404
+
+
 class TestSQLHistory:
     """Tests for SQL version history."""
 
@@ -4,8 +4,11 @@ These tests verify S3 functionality using LocalStack testcontainers:
 - Creating and connecting to S3 connections
 - Listing files and folders in S3 buckets
 - Password/credential masking for saved connections
+- Streaming query results as NDJSON
 """
 
+import json
+
 from httpx import AsyncClient
 
 
@@ -74,6 +77,36 @@ class TestS3Connection:
             params={"delete_saved": True},
         )
 
+    async def test_s3_reconnect_all(self, test_client: AsyncClient, s3_connection_config):
+        """Should reconnect saved S3 connections in one batch."""
+        # Create connection, then drop it from memory but keep it saved
+        response = await test_client.post(
+            "/api/connections/",
+            json=s3_connection_config,
+        )
+        assert response.status_code == 200
+        connection_id = response.json()["connection_id"]
+        await test_client.delete(f"/api/connections/{connection_id}")
+
+        # Reconnect all saved connections
+        response = await test_client.post("/api/connections/reconnect")
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results == [
+            {
+                "connection_id": connection_id,
+                "success": True,
+                "message": f"Successfully reconnected to {s3_connection_config['name']}",
+            }
+        ]
+
+        # Cleanup
+        await test_client.delete(
+            f"/api/connections/{connection_id}",
+            params={"delete_saved": True},
+        )
+
 
 class TestS3FileOperations:
     """Tests for S3 file listing and metadata operations."""
@@ -203,3 +236,48 @@ class TestS3FileOperations:
             f"/api/connections/{connection_id}",
             params={"delete_saved": True},
         )
+
+
+class TestS3QueryStreaming:
+    """Tests for streaming S3 query results as NDJSON."""
+
+    async def test_stream_query_unknown_connection(self, test_client: AsyncClient):
+        """Should return 404 for an unknown connection."""
+        response = await test_client.post(
+            "/api/s3/nonexistent/query/stream",
+            json={"query": "SELECT 1"},
+        )
+
+        assert response.status_code == 404
+
+    async def test_stream_query_rows(self, test_client: AsyncClient, s3_connection_config):
+        """Should stream one JSON object per row."""
+        # Create connection
+        response = await test_client.post(
+            "/api/connections/",
+            json=s3_connection_config,
+        )
+        assert response.status_code == 200
+        connection_id = response.json()["connection_id"]
+
+        response = await test_client.post(
+            f"/api/s3/{connection_id}/query/stream",
+            json={
+                "query": "SELECT id, name FROM read_csv('s3://test-bucket/data/sample.csv') ORDER BY id"
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows == [
+            {"id": 1, "name": "Alice"},
+            {"id": 2, "name": "Bob"},
+            {"id": 3, "name": "Charlie"},
+        ]
+
+        # Cleanup
+        await test_client.delete(
+            f"/api/connections/{connection_id}",
+            params={"delete_saved": True},
+        )
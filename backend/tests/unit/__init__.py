@@ -0,0 +1 @@
+# Unit Tests
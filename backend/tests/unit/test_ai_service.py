@@ -0,0 +1,119 @@
+"""Unit tests for the AI service.
+
+These tests verify:
+- Caching of rendered schema contexts
+- Concurrent batch generation
+"""
+
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+from app.services import ai_service as ai_mod
+from app.services.ai_service import AIService
+
+METADATA = [
+    {
+        "source_type": "file",
+        "view_name": "file_orders",
+        "file_name": "orders.csv",
+        "row_count": 3,
+        "columns": [{"name": "id", "type": "INTEGER", "nullable": False, "is_primary_key": True}],
+    }
+]
+
+
+class TestSchemaContext:
+    """Tests for AIService._format_schema_context()."""
+
+    def test_cached_regardless_of_key_order(self, monkeypatch):
+        """Should reuse the rendered context for the same metadata built in another order."""
+        monkeypatch.setattr(ai_mod, "_schema_context_cache", OrderedDict())
+        service = AIService(model="gpt-4o")
+        reordered = [
+            {
+                "columns": [
+                    {"is_primary_key": True, "nullable": False, "type": "INTEGER", "name": "id"}
+                ],
+                "row_count": 3,
+                "file_name": "orders.csv",
+                "view_name": "file_orders",
+                "source_type": "file",
+            }
+        ]
+
+        context = service._format_schema_context(METADATA)
+
+        assert service._format_schema_context(reordered) == context
+        assert len(ai_mod._schema_context_cache) == 1
+
+    def test_changed_metadata_is_rendered_again(self, monkeypatch):
+        """Should not serve a cached context for different metadata."""
+        monkeypatch.setattr(ai_mod, "_schema_context_cache", OrderedDict())
+        service = AIService(model="gpt-4o")
+        changed = [{**METADATA[0], "row_count": 4}]
+
+        assert service._format_schema_context(changed) != service._format_schema_context(METADATA)
+        assert len(ai_mod._schema_context_cache) == 2
+
+
+class TestGenerateSQLBatch:
+    """Tests for AIService.generate_sql_batch()."""
+
+    async def test_bounded_concurrency_and_order(self, monkeypatch):
+        """Should keep at most max_concurrency calls in flight and return results in order."""
+        service = AIService(model="gpt-4o")
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_generate(prompt, query_metadata, additional_instructions=None):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            # Later prompts finish first, so order can't come from completion order
+            await asyncio.sleep(0.01 / (int(prompt) + 1))
+            in_flight -= 1
+            return {"sql": f"SELECT {prompt}", "explanation": ""}
+
+        monkeypatch.setattr(service, "generate_sql_from_prompt", fake_generate)
+
+        prompts = [str(i) for i in range(7)]
+        results = await service.generate_sql_batch(
+            [(prompt, METADATA) for prompt in prompts], max_concurrency=3
+        )
+
+        assert [result["sql"] for result in results] == [f"SELECT {p}" for p in prompts]
+        assert max_in_flight == 3
+
+    async def test_per_item_metadata_and_failures(self, monkeypatch):
+        """Should pass each item's metadata and return failures in place."""
+        service = AIService(model="gpt-4o")
+
+        async def fake_generate(prompt, query_metadata, additional_instructions=None):
+            if prompt == "bad":
+                raise RuntimeError("provider error")
+            return {"sql": f"SELECT * FROM {query_metadata[0]['view_name']}", "explanation": ""}
+
+        monkeypatch.setattr(service, "generate_sql_from_prompt", fake_generate)
+
+        other = [{**METADATA[0], "view_name": "file_users"}]
+        results = await service.generate_sql_batch(
+            [("orders", METADATA), ("bad", METADATA), ("users", other)]
+        )
+
+        assert results[0] == {"sql": "SELECT * FROM file_orders", "explanation": ""}
+        assert isinstance(results[1], RuntimeError)
+        assert results[2] == {"sql": "SELECT * FROM file_users", "explanation": ""}
+
+    async def test_fail_fast(self, monkeypatch):
+        """Should raise the first failure when return_exceptions is off."""
+        service = AIService(model="gpt-4o")
+
+        async def fake_generate(prompt, query_metadata, additional_instructions=None):
+            raise RuntimeError("provider error")
+
+        monkeypatch.setattr(service, "generate_sql_from_prompt", fake_generate)
+
+        with pytest.raises(RuntimeError):
+            await service.generate_sql_batch([("orders", METADATA)], return_exceptions=False)
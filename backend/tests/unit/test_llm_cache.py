@@ -0,0 +1,368 @@
+"""Unit tests for the LLM response caches.
+
+These tests verify:
+- Cache keys and the temperature cutoff
+- LRU eviction and expiry of the in-memory backend
+- The SQLite backend, including storage errors
+- Sharing of in-flight calls in LLMCache
+- Similarity threshold and expiry of the semantic cache
+- Chat message templates and the SQL template cache
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.services.llm_cache import (
+    CACHEABLE_MAX_TEMPERATURE,
+    InMemoryLRUCache,
+    LLMCache,
+    SemanticCache,
+    SQLiteCacheBackend,
+    TemplateCache,
+    _split_on_slots,
+    cache_key,
+    extract_template,
+)
+
+MESSAGES = [{"role": "user", "content": "count orders"}]
+RESULT = {"sql": "SELECT COUNT(*) FROM orders", "explanation": "Counts orders"}
+
+
+class TestCacheKey:
+    """Tests for cache_key()."""
+
+    def test_same_call_same_key(self):
+        """Should build the same key for identical calls."""
+        assert cache_key("gpt-4o", MESSAGES, 0.1) == cache_key("gpt-4o", list(MESSAGES), 0.1)
+
+    def test_key_depends_on_model_messages_and_temperature(self):
+        """Should build different keys when any part of the call differs."""
+        key = cache_key("gpt-4o", MESSAGES, 0.1)
+
+        assert cache_key("gpt-4o-mini", MESSAGES, 0.1) != key
+        assert cache_key("gpt-4o", [{"role": "user", "content": "count users"}], 0.1) != key
+        assert cache_key("gpt-4o", MESSAGES, 0.0) != key
+
+    def test_temperature_cutoff(self):
+        """Should not cache calls above the temperature cutoff."""
+        assert cache_key("gpt-4o", MESSAGES, CACHEABLE_MAX_TEMPERATURE) is not None
+        assert cache_key("gpt-4o", MESSAGES, CACHEABLE_MAX_TEMPERATURE + 0.1) is None
+
+
+class TestInMemoryLRUCache:
+    """Tests for the in-process cache backend."""
+
+    async def test_get_missing(self):
+        """Should return None for unknown keys."""
+        assert await InMemoryLRUCache(maxsize=2).get("missing") is None
+
+    async def test_evicts_least_recently_used(self):
+        """Should drop the least recently used entry once maxsize is exceeded."""
+        cache = InMemoryLRUCache(maxsize=2)
+        await cache.set("a", {"sql": "a"}, ttl=60)
+        await cache.set("b", {"sql": "b"}, ttl=60)
+        # Reading "a" makes "b" the least recently used
+        await cache.get("a")
+        await cache.set("c", {"sql": "c"}, ttl=60)
+
+        assert await cache.get("a") == {"sql": "a"}
+        assert await cache.get("b") is None
+        assert await cache.get("c") == {"sql": "c"}
+
+    async def test_expired_entry(self):
+        """Should treat expired entries as missing."""
+        cache = InMemoryLRUCache(maxsize=2)
+        await cache.set("a", {"sql": "a"}, ttl=0)
+
+        assert await cache.get("a") is None
+
+
+class TestSQLiteCacheBackend:
+    """Tests for the database cache backend."""
+
+    @pytest.fixture
+    def backend(self, test_db_path: Path):
+        """A backend on a migrated test database."""
+        from app.services.migration_service import MigrationService
+
+        MigrationService(db_path=test_db_path).run_migrations()
+        backend = SQLiteCacheBackend(test_db_path)
+        yield backend
+        backend.close()
+
+    async def test_hit(self, backend: SQLiteCacheBackend):
+        """Should return a stored value."""
+        await backend.set("key", RESULT, ttl=60)
+
+        assert await backend.get("key") == RESULT
+
+    async def test_miss(self, backend: SQLiteCacheBackend):
+        """Should return None for unknown keys."""
+        assert await backend.get("missing") is None
+
+    async def test_overwrite(self, backend: SQLiteCacheBackend):
+        """Should replace the value stored for a key."""
+        await backend.set("key", RESULT, ttl=60)
+        await backend.set("key", {"sql": "SELECT 1", "explanation": ""}, ttl=60)
+
+        assert await backend.get("key") == {"sql": "SELECT 1", "explanation": ""}
+
+    async def test_expired_entry(self, backend: SQLiteCacheBackend):
+        """Should treat expired entries as missing."""
+        await backend.set("key", RESULT, ttl=0)
+
+        assert await backend.get("key") is None
+
+    async def test_survives_reopening(self, backend: SQLiteCacheBackend):
+        """Should keep entries after the connection is closed."""
+        await backend.set("key", RESULT, ttl=60)
+        backend.close()
+
+        assert await backend.get("key") == RESULT
+
+    async def test_storage_error_is_a_miss(self, test_db_path: Path):
+        """Should treat a database error as a miss instead of raising."""
+        # Not migrated, so the cache table doesn't exist
+        backend = SQLiteCacheBackend(test_db_path)
+        try:
+            await backend.set("key", RESULT, ttl=60)
+            assert await backend.get("key") is None
+        finally:
+            backend.close()
+
+
+class TestLLMCache:
+    """Tests for LLMCache.get_or_compute()."""
+
+    async def test_computes_once(self):
+        """Should serve repeated calls from the backend."""
+        cache = LLMCache(InMemoryLRUCache(maxsize=8), ttl=60)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return dict(RESULT)
+
+        assert await cache.get_or_compute("key", compute) == RESULT
+        assert await cache.get_or_compute("key", compute) == RESULT
+        assert calls == 1
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    async def test_concurrent_misses_share_one_call(self):
+        """Should run one computation for concurrent misses on the same key."""
+        cache = LLMCache(InMemoryLRUCache(maxsize=8), ttl=60)
+        release = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return dict(RESULT)
+
+        tasks = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == [RESULT] * 3
+        assert calls == 1
+        assert cache._pending == {}
+
+    async def test_failed_compute_is_not_cached(self):
+        """Should propagate a failure to all waiters and clear the pending call."""
+        cache = LLMCache(InMemoryLRUCache(maxsize=8), ttl=60)
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise RuntimeError("provider error")
+
+        tasks = [asyncio.create_task(cache.get_or_compute("key", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache._pending == {}
+
+        async def compute():
+            return dict(RESULT)
+
+        assert await cache.get_or_compute("key", compute) == RESULT
+
+    async def test_returns_copies(self):
+        """Should not let callers mutate the cached value."""
+        cache = LLMCache(InMemoryLRUCache(maxsize=8), ttl=60)
+
+        async def compute():
+            return dict(RESULT)
+
+        first = await cache.get_or_compute("key", compute)
+        first["sql"] = "changed"
+
+        assert await cache.get_or_compute("key", compute) == RESULT
+
+
+class TestSemanticCache:
+    """Tests for the embedding similarity cache."""
+
+    def test_hit_above_threshold(self):
+        """Should return the value of a similar enough prompt in the same scope."""
+        cache = SemanticCache(maxsize=8, threshold=0.95, ttl=60)
+        cache.add("scope", [1.0, 0.0], RESULT)
+
+        assert cache.lookup("scope", [0.99, 0.05]) == RESULT
+        assert cache.hits == 1
+
+    def test_miss_below_threshold(self):
+        """Should miss when the closest prompt is not similar enough."""
+        cache = SemanticCache(maxsize=8, threshold=0.95, ttl=60)
+        cache.add("scope", [1.0, 0.0], RESULT)
+
+        assert cache.lookup("scope", [0.5, 0.5]) is None
+        assert cache.misses == 1
+
+    def test_scopes_are_separate(self):
+        """Should only match entries from the same scope."""
+        cache = SemanticCache(maxsize=8, threshold=0.95, ttl=60)
+        cache.add("scope", [1.0, 0.0], RESULT)
+
+        assert cache.lookup("other scope", [1.0, 0.0]) is None
+
+    def test_expired_entries(self):
+        """Should not return entries older than the ttl."""
+        cache = SemanticCache(maxsize=8, threshold=0.95, ttl=0)
+        cache.add("scope", [1.0, 0.0], RESULT)
+
+        assert cache.lookup("scope", [1.0, 0.0]) is None
+        assert len(cache._entries) == 0
+
+    def test_drops_oldest_at_maxsize(self):
+        """Should drop the oldest entry once maxsize is reached."""
+        cache = SemanticCache(maxsize=1, threshold=0.95, ttl=60)
+        cache.add("scope", [1.0, 0.0], {"sql": "old", "explanation": ""})
+        cache.add("scope", [0.0, 1.0], {"sql": "new", "explanation": ""})
+
+        assert cache.lookup("scope", [1.0, 0.0]) is None
+        assert cache.lookup("scope", [0.0, 1.0]) == {"sql": "new", "explanation": ""}
+
+
+class TestExtractTemplate:
+    """Tests for extract_template()."""
+
+    def test_numbers_and_dates_become_slots(self):
+        """Should mask numbers and ISO dates, quoted or not."""
+        assert extract_template("orders after '2024-01-01' over 100") == (
+            "orders after '?' over ?",
+            ("2024-01-01", "100"),
+        )
+
+    def test_strings_stay_in_template(self):
+        """Should keep other quoted strings, which are unsafe to substitute."""
+        assert extract_template('name = "O\'Brien", top 5') == (
+            'name = "O\'Brien", top ?',
+            ("5",),
+        )
+        assert extract_template("only region 'EU'") == ("only region 'EU'", ())
+
+    def test_numbers_inside_words_are_ignored(self):
+        """Should not treat digits inside identifiers as literals."""
+        assert extract_template("use table sales_2024 v2") == ("use table sales_2024 v2", ())
+
+    def test_repeated_values(self):
+        """Should not template messages that repeat a value."""
+        assert extract_template("between 10 and 10") == ("between 10 and 10", ())
+
+
+class TestSplitOnSlots:
+    """Tests for _split_on_slots()."""
+
+    def test_splits_on_each_slot(self):
+        """Should replace each slot value with its index."""
+        sql = "SELECT * FROM orders WHERE day >= '2024-01-01' LIMIT 100"
+
+        assert _split_on_slots(sql, ("2024-01-01", "100"), exactly_once=True) == (
+            "SELECT * FROM orders WHERE day >= '",
+            0,
+            "' LIMIT ",
+            1,
+            "",
+        )
+
+    def test_only_matches_whole_values(self):
+        """Should not match a slot value inside a longer number or word."""
+        assert _split_on_slots("LIMIT 100", ("10",), exactly_once=True) is None
+
+    def test_exactly_once(self):
+        """Should reject missing or repeated values when exactly_once is set."""
+        assert _split_on_slots("LIMIT 5", ("5", "7"), exactly_once=True) is None
+        assert _split_on_slots("LIMIT 5 OFFSET 5", ("5",), exactly_once=True) is None
+        assert _split_on_slots("LIMIT 5 OFFSET 5", ("5",), exactly_once=False) == (
+            "LIMIT ",
+            0,
+            " OFFSET ",
+            0,
+            "",
+        )
+
+
+def _response(limit: str) -> dict[str, str]:
+    return {"sql": f"SELECT * FROM orders LIMIT {limit}", "explanation": f"First {limit} orders"}
+
+
+class TestTemplateCache:
+    """Tests for the SQL template cache."""
+
+    def test_needs_confirmation(self):
+        """Should not serve a template seen only once."""
+        cache = TemplateCache(maxsize=8)
+        cache.record("key", ("10",), _response("10"))
+
+        assert cache.lookup("key", ("25",)) is None
+
+    def test_same_values_do_not_confirm(self):
+        """Should only count confirmations from different values."""
+        cache = TemplateCache(maxsize=8)
+        cache.record("key", ("10",), _response("10"))
+        cache.record("key", ("10",), _response("10"))
+
+        assert cache.lookup("key", ("25",)) is None
+
+    def test_confirmed_template_renders_new_values(self):
+        """Should substitute new values once the template generalized."""
+        cache = TemplateCache(maxsize=8)
+        cache.record("key", ("10",), _response("10"))
+        cache.record("key", ("20",), _response("20"))
+
+        assert cache.lookup("key", ("25",)) == _response("25")
+        assert cache.hits == 1
+
+    def test_different_template_resets_confirmations(self):
+        """Should start over when a response doesn't fit the stored template."""
+        cache = TemplateCache(maxsize=8)
+        cache.record("key", ("10",), _response("10"))
+        cache.record(
+            "key", ("20",), {"sql": "SELECT * FROM orders WHERE id < 20", "explanation": ""}
+        )
+
+        assert cache.lookup("key", ("25",)) is None
+
+    def test_rejects_responses_without_the_values(self):
+        """Should drop the entry when the SQL doesn't carry the values over."""
+        cache = TemplateCache(maxsize=8)
+        cache.record("key", ("10",), _response("10"))
+        cache.record("key", ("20",), _response("20"))
+        cache.record("key", ("30",), {"sql": "SELECT * FROM orders", "explanation": ""})
+
+        assert cache.lookup("key", ("25",)) is None
+
+    def test_rejects_wrong_slot_count(self):
+        """Should not render a template with a different number of values."""
+        cache = TemplateCache(maxsize=8)
+        cache.record("key", ("10",), _response("10"))
+        cache.record("key", ("20",), _response("20"))
+
+        assert cache.lookup("key", ("25", "30")) is None
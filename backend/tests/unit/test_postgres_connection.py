@@ -0,0 +1,110 @@
+"""Unit tests for PostgreSQL metadata caching.
+
+These tests verify:
+- Invalidation while a metadata fetch is in flight
+- Copies returned from the table details cache
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.connections import postgres as postgres_mod
+from app.connections.postgres import PostgresConnection
+from app.models.schemas import ConnectionMetadataLite
+
+CONFIG = {
+    "host": "localhost",
+    "port": 5432,
+    "database": "testdb",
+    "username": "testuser",
+    "password": "testpass",
+}
+
+
+class FakeCollector:
+    """Stands in for PostgresMetadataCollector, counting calls."""
+
+    calls = 0
+    release: asyncio.Event | None = None
+
+    def __init__(self, config):
+        pass
+
+    async def collect_metadata(self, connection_id, connection_name):
+        type(self).calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return ConnectionMetadataLite(
+            connection_id=connection_id,
+            connection_name=connection_name,
+            source_type="postgres",
+            schemas=[],
+        )
+
+    async def get_table_details(self, schema_name, table_name):
+        type(self).calls += 1
+        column = SimpleNamespace(name="id", type="integer", nullable=False, is_primary_key=True)
+        return SimpleNamespace(
+            name=table_name, schema_name=schema_name, columns=[column], row_count=3
+        )
+
+
+@pytest.fixture
+def connection(monkeypatch) -> PostgresConnection:
+    """A Postgres connection with empty caches and a fake metadata collector."""
+    monkeypatch.setattr(FakeCollector, "calls", 0)
+    monkeypatch.setattr(FakeCollector, "release", None)
+    monkeypatch.setattr(postgres_mod, "PostgresMetadataCollector", FakeCollector)
+    monkeypatch.setattr(PostgresConnection, "_metadata_cache", {})
+    monkeypatch.setattr(PostgresConnection, "_metadata_locks", {})
+    monkeypatch.setattr(PostgresConnection, "_cache_generations", {})
+    monkeypatch.setattr(PostgresConnection, "_table_details_cache", postgres_mod.OrderedDict())
+    return PostgresConnection("conn-1", "Test PostgreSQL", CONFIG)
+
+
+class TestMetadataCache:
+    """Tests for PostgresConnection.collect_metadata() caching."""
+
+    async def test_cached(self, connection: PostgresConnection):
+        """Should serve repeated calls from the cache."""
+        await connection.collect_metadata()
+        await connection.collect_metadata()
+
+        assert FakeCollector.calls == 1
+
+    async def test_invalidation_during_fetch(self, connection: PostgresConnection):
+        """Should not store a result fetched before an invalidation."""
+        FakeCollector.release = asyncio.Event()
+        in_flight = asyncio.create_task(connection.collect_metadata())
+        await asyncio.sleep(0)
+        lock = PostgresConnection._metadata_locks["conn-1"]
+
+        connection.invalidate_cache()
+        FakeCollector.release.set()
+        await in_flight
+
+        # The lock is kept, and the refresh fetches again instead of using the stale result
+        assert PostgresConnection._metadata_locks["conn-1"] is lock
+        await connection.collect_metadata()
+        assert FakeCollector.calls == 2
+        await connection.collect_metadata()
+        assert FakeCollector.calls == 2
+
+
+class TestTableDetailsCache:
+    """Tests for PostgresConnection.get_table_details() caching."""
+
+    async def test_returns_copies(self, connection: PostgresConnection):
+        """Should not let callers modify the cached details."""
+        details = await connection.get_table_details("public", "orders")
+        details["columns"][0]["name"] = "changed"
+        details["columns"].append({"name": "extra"})
+
+        cached = await connection.get_table_details("public", "orders")
+
+        assert FakeCollector.calls == 1
+        assert cached["columns"] == [
+            {"name": "id", "type": "integer", "nullable": False, "is_primary_key": True}
+        ]
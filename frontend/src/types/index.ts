@@ -168,15 +168,6 @@ export interface QueryExecutionRequest {
   query_id?: string;
 }
 
-export interface QueryExecutionResult {
-  success: boolean;
-  columns?: string[];
-  rows?: Record<string, any>[];
-  row_count?: number;
-  execution_time_ms?: number;
-  error?: string;
-}
-
 export interface QueryHistoryItem {
   id: string;
   query_id: string;
@@ -202,16 +193,20 @@ export interface QueryExecuteRequest {
   page?: number;
   page_size?: number;
   sql_text: string; // Execute this SQL from the current editor
+  layout?: 'rows' | 'columns'; // 'columns' returns column-major values in `data`
 }
 
 export interface QueryExecuteResult {
   success: boolean;
   columns?: string[];
   rows?: Record<string, any>[];
+  data?: any[][]; // Column-major values when layout is 'columns'
   total_rows?: number;
   page: number;
   page_size: number;
   total_pages?: number;
+  execution_time_us?: number;
+  /** @deprecated Use execution_time_us */
   execution_time_ms?: number;
   error?: string;
 }